@@ -5,7 +5,7 @@ a = Analysis(
     ['game_engine.py'],
     pathex=[],
     binaries=[],
-    datas=[('bg_forest.png', '.'), ('bg_cave.png', '.'), ('bg_dungeon.png', '.'), ('tree.png', '.'), ('rock.png', '.'), ('pillar.png', '.'), ('player.png', '.'), ('slash.png', '.'), ('fireball.png', '.'), ('goblin.png', '.'), ('shadow.png', '.'), ('ogre.png', '.'), ('brain.png', '.'), ('PressStart2P.ttf', '.')],
+    datas=[('bg_forest.png', '.'), ('bg_cave.png', '.'), ('bg_dungeon.png', '.'), ('tree.png', '.'), ('rock.png', '.'), ('pillar.png', '.'), ('player.png', '.'), ('slash.png', '.'), ('fireball.png', '.'), ('goblin.png', '.'), ('shadow.png', '.'), ('ogre.png', '.'), ('brain.png', '.'), ('PressStart2P.ttf', '.'), ('setup_database_sqlite.sql', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
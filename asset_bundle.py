@@ -0,0 +1,109 @@
+"""
+Paquete de imágenes pre-horneadas (assets.bundle).
+
+Paso de build:  python asset_bundle.py
+Guarda cada imagen de IMAGE_ASSETS ya escalada a su tamaño final como
+píxeles BGRA crudos (el formato nativo de convert_alpha), más un índice
+con tamaño, formato, CRC de los píxeles y tamaño/mtime del PNG de origen. En
+ejecución el paquete se mapea en memoria y las Surface apuntan directamente
+a esas páginas, sin decodificar ni copiar.
+"""
+import json
+import mmap
+import os
+import struct
+import zlib
+
+import pygame
+
+BUNDLE_PATH = "assets.bundle"
+MAGIC = b"RPGB"
+VERSION = 2
+HEADER = struct.Struct("<4sII")     # magic, versión, longitud del índice
+ALIGN = 64
+ALPHA_MASKS = (0xFF0000, 0xFF00, 0xFF, 0xFF000000)   # BGRA en memoria (little endian)
+
+def source_stat(name):
+    """(bytes, mtime en ns) del PNG de origen: comprobar vigencia no lee el fichero."""
+    try:
+        st = os.stat(name)
+        return [st.st_size, st.st_mtime_ns]
+    except OSError:
+        return None
+
+# --- HORNEADO ---
+def bake(assets, path=BUNDLE_PATH):
+    index, blobs, offset = {}, [], 0
+    for name, size in assets.items():
+        try:
+            img = pygame.transform.scale(pygame.image.load(name), size)
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"  {name}: omitido ({e})"); continue
+        pixels = pygame.image.tobytes(img, "BGRA")
+        pad = (-offset) % ALIGN
+        blobs.append(b"\0" * pad + pixels); offset += pad
+        index[name] = {"offset": offset, "length": len(pixels), "size": list(size), "format": "BGRA",
+                       "crc": zlib.crc32(pixels), "source": source_stat(name)}
+        offset += len(pixels)
+        print(f"  {name}: {size[0]}x{size[1]} ({len(pixels) // 1024} KB)")
+
+    idx = json.dumps(index, separators=(",", ":")).encode()
+    data_start = HEADER.size + len(idx)
+    data_start += (-data_start) % ALIGN
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(idx))); f.write(idx)
+        f.write(b"\0" * (data_start - HEADER.size - len(idx)))
+        for b in blobs: f.write(b)
+    os.replace(tmp, path)
+    print(f"Paquete {path}: {len(index)} imágenes, {os.path.getsize(path) // 1024} KB")
+
+# --- CARGA EN EJECUCIÓN ---
+class AssetBundle:
+    def __init__(self, path=BUNDLE_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            # ACCESS_COPY: si algo pinta sobre una Surface, la página se copia y el fichero no se toca
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, version, idx_len = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION: raise ValueError(f"{path}: formato de paquete no soportado")
+        self.index = json.loads(self._map[HEADER.size:HEADER.size + idx_len])
+        data_start = HEADER.size + idx_len
+        self._data = data_start + (-data_start) % ALIGN
+        self._view = memoryview(self._map)
+        self._fresh = {}     # (nombre, tamaño) -> vigente; se comprueba una vez por proceso
+        self.zero_copy = 0
+
+    @classmethod
+    def open(cls, path=BUNDLE_PATH):
+        if not os.path.exists(path): return None
+        try: return cls(path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Paquete de assets inválido: {e}")
+            return None
+
+    def is_fresh(self, name, size):
+        """Vigente si el tamaño coincide y el PNG de origen no cambió (o no está, p.ej. en el .exe)."""
+        key = (name, tuple(size))
+        if key not in self._fresh:
+            entry = self.index.get(name)
+            if not entry or tuple(entry["size"]) != key[1]: self._fresh[key] = False
+            else:
+                stat = source_stat(name)
+                self._fresh[key] = stat is None or stat == entry["source"]
+        return self._fresh[key]
+
+    def surface(self, name, verify=False):
+        entry = self.index[name]
+        start = self._data + entry["offset"]
+        view = self._view[start:start + entry["length"]]
+        if verify and zlib.crc32(view) != entry["crc"]: return None
+        surf = pygame.image.frombuffer(view, tuple(entry["size"]), entry["format"])
+        if surf.get_masks() == ALPHA_MASKS:
+            self.zero_copy += 1
+            return surf
+        return surf.convert_alpha()   # big endian u otro formato: una copia
+
+if __name__ == "__main__":
+    from game_engine import IMAGE_ASSETS
+    bake(IMAGE_ASSETS)
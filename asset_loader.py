@@ -0,0 +1,86 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+# --- CARGA DE IMÁGENES EN PARALELO ---
+def decode_scaled(name, size):
+    """
+    Decodifica y escala en un hilo del pool (SDL suelta el GIL en ambas
+    operaciones). Devuelve los píxeles RGBA crudos: las Surface finales se
+    crean en el hilo principal, que es el único que puede hacer convert_alpha.
+    """
+    start = time.perf_counter()
+    img = pygame.image.load(name)
+    img = pygame.transform.scale(img, size)
+    return pygame.image.tobytes(img, "RGBA"), size, (time.perf_counter() - start) * 1000
+
+
+class AssetLoader:
+    """
+    Decodifica en un pool de hilos. start() encola `assets`; submit() añade
+    más en cualquier momento (el pool se cierra al vaciarse y se vuelve a
+    abrir). El informe de tiempos solo se imprime al terminar la primera tanda.
+    """
+    def __init__(self, assets=(), workers=None):
+        self.assets = dict(assets)      # nombre -> tamaño final
+        self.workers = workers or min(8, (os.cpu_count() or 2))
+        self.timings = {}               # nombre -> ms de decodificación
+        self._pool = None
+        self._futures = {}
+        self._start = 0.0
+        self.elapsed = 0.0
+        self.batches = 0
+
+    def start(self):
+        self.submit(self.assets)
+
+    def submit(self, assets):
+        if not self._pool:
+            self._start = time.perf_counter()
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="AssetLoader")
+        for name, size in dict(assets).items():
+            if name in self._futures: continue
+            self.assets[name] = size
+            self._futures[name] = self._pool.submit(decode_scaled, name, size)
+
+    def pending(self, name):
+        return name in self._futures
+
+    @property
+    def done(self):
+        return not self._futures
+
+    def poll(self):
+        """Devuelve [(nombre, Surface|None)] de lo que ya terminó. Llamar desde el hilo principal."""
+        ready = []
+        for name, fut in list(self._futures.items()):
+            if not fut.done(): continue
+            del self._futures[name]
+            try:
+                buf, size, ms = fut.result()
+                surf = pygame.image.frombytes(buf, size, "RGBA").convert_alpha()
+                self.timings[name] = ms
+            except Exception:
+                surf = None; self.timings[name] = -1.0
+            ready.append((name, surf))
+        if not self._futures and self._pool:
+            self._pool.shutdown(wait=False); self._pool = None
+            self.elapsed = (time.perf_counter() - self._start) * 1000
+            self.batches += 1
+            if self.batches == 1: self.report()
+        return ready
+
+    def wait(self):
+        """Bloquea hasta cargar todo (modo síncrono)."""
+        ready = []
+        while not self.done:
+            for fut in list(self._futures.values()): fut.exception()
+            ready += self.poll()
+        return ready
+
+    def report(self):
+        for name, ms in sorted(self.timings.items(), key=lambda kv: -kv[1]):
+            print(f"  {name}: {'ERROR' if ms < 0 else f'{ms:.1f} ms'}")
+        print(f"Assets: {len(self.timings)} en {self.elapsed:.1f} ms ({self.workers} hilos)")
@@ -0,0 +1,118 @@
+import os
+from collections import OrderedDict
+
+from asset_loader import AssetLoader
+
+# RPG_ASSET_BUDGET_MB: memoria para imágenes residentes (las fijadas nunca se expulsan)
+ASSET_BUDGET_MB = float(os.environ.get("RPG_ASSET_BUDGET_MB", "8"))
+
+def surface_bytes(surf):
+    return surf.get_pitch() * surf.get_height()
+
+# --- RESIDENCIA DE IMÁGENES POR FASE ---
+class AssetManager:
+    """
+    Imágenes cargadas bajo demanda en lugar de todas al arrancar. `images`
+    es el diccionario que usa el dibujo (None = aún no está, se dibuja sin
+    ella). Las globales (jugador, menús...) quedan fijadas siempre; al entrar
+    en una fase se fijan las suyas, se cargan si faltan y se precargan en
+    segundo plano las de la siguiente. Si se pasa de `budget` bytes se
+    expulsan las no fijadas que hace más tiempo que no se usan (LRU).
+    Con el paquete de assets la carga es una vista mmap inmediata; si no,
+    se decodifica en el pool de AssetLoader y llega por poll().
+    """
+    def __init__(self, assets, bundle=None, budget=ASSET_BUDGET_MB * 2 ** 20, pinned=()):
+        self.assets = dict(assets)           # nombre -> tamaño final
+        self.bundle = bundle
+        self.budget = budget
+        self.images = {name: None for name in self.assets}
+        self.loader = AssetLoader()
+        self.pinned_global = set(pinned)
+        self.pinned = set(pinned)
+        self._lru = OrderedDict()            # nombre -> bytes, del menos al más reciente
+        self._prefetched = set()             # cargadas por adelantado y aún sin usar
+        self.stats = {"hits": 0, "misses": 0, "prefetched": 0, "prefetch_hits": 0, "prefetch_skipped": 0,
+                      "evictions": 0, "peak_bytes": 0}
+
+    @property
+    def resident_bytes(self):
+        return sum(self._lru.values())
+
+    @property
+    def done(self):
+        return self.loader.done
+
+    # --- Peticiones ---
+    def _load(self, name):
+        """Pide una imagen que no está: del paquete al momento o al pool de decodificación."""
+        if self.images[name] is not None or self.loader.pending(name): return
+        if self.bundle and self.bundle.is_fresh(name, self.assets[name]): self._insert(name, self.bundle.surface(name))
+        else: self.loader.submit({name: self.assets[name]})
+
+    def require(self, names):
+        """Las necesita el dibujo ya: se marcan como recientes y se cargan si faltan."""
+        for name in names:
+            if self.images[name] is not None:
+                self.stats["hits"] += 1
+                if name in self._prefetched: self.stats["prefetch_hits"] += 1; self._prefetched.discard(name)
+                self._lru.move_to_end(name)
+            else:
+                self.stats["misses"] += 1; self._prefetched.discard(name)
+                self._load(name)
+
+    def prefetch(self, names):
+        """Carga por adelantado lo que quepa en el presupuesto junto a lo fijado (si no, se expulsaría al llegar)."""
+        room = self.budget - sum(b for name, b in self._lru.items() if name in self.pinned)
+        for name in names:
+            if self.images[name] is not None or self.loader.pending(name): continue
+            w, h = self.assets[name]
+            room -= w * h * 4
+            if room < 0: self.stats["prefetch_skipped"] += 1; continue
+            self._prefetched.add(name); self.stats["prefetched"] += 1
+            self._load(name)
+
+    def enter_stage(self, names, next_names=()):
+        """Fija las imágenes de la fase, las carga si faltan y precarga las de la siguiente."""
+        self.pinned = self.pinned_global | set(names)
+        self.require(self.pinned)
+        self.prefetch(n for n in next_names if n not in self.pinned)
+        self._evict()
+
+    # --- Llegadas y expulsión ---
+    def poll(self):
+        """Recoge lo decodificado (hilo principal). Devuelve True si llegó algo."""
+        ready = self.loader.poll()
+        for name, surf in ready:
+            if surf is not None: self._insert(name, surf)
+        return bool(ready)
+
+    def wait(self):
+        for name, surf in self.loader.wait():
+            if surf is not None: self._insert(name, surf)
+
+    def _insert(self, name, surf):
+        self.images[name] = surf
+        self._lru[name] = surface_bytes(surf); self._lru.move_to_end(name)
+        self.stats["peak_bytes"] = max(self.stats["peak_bytes"], self.resident_bytes)
+        self._evict()
+
+    def _evict(self):
+        total = self.resident_bytes
+        for name in list(self._lru):
+            if total <= self.budget: break
+            if name in self.pinned: continue
+            total -= self._lru.pop(name)
+            self.images[name] = None; self._prefetched.discard(name)
+            self.stats["evictions"] += 1
+
+    # --- Informe ---
+    def resident(self):
+        """[(nombre, bytes, fijada)] de lo residente, del menos al más reciente."""
+        return [(name, b, name in self.pinned) for name, b in self._lru.items()]
+
+    def report(self):
+        st = self.stats
+        for name, b, pinned in self.resident(): print(f"  {name}: {b / 1024:.0f} KB{' (fijada)' if pinned else ''}")
+        print(f"Imágenes residentes: {len(self._lru)}/{len(self.assets)}, {self.resident_bytes / 2 ** 20:.2f} MB "
+              f"(presupuesto {self.budget / 2 ** 20:.1f} MB, pico {st['peak_bytes'] / 2 ** 20:.2f} MB) | {st['hits']} aciertos, "
+              f"{st['misses']} fallos, {st['prefetch_hits']}/{st['prefetched']} precargas usadas ({st['prefetch_skipped']} sin sitio), {st['evictions']} expulsiones")
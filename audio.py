@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from collections import namedtuple
+
+import pygame
+
+# priority: la más alta puede cortar a una más baja si no quedan canales libres
+# min_interval: segundos mínimos entre dos disparos del mismo efecto
+# max_voices: copias del efecto sonando a la vez como mucho
+Effect = namedtuple("Effect", "path priority min_interval max_voices volume", defaults=(1.0,))
+
+EFFECTS = {
+    "hit": Effect("hit.wav", 1, 0.06, 3),
+    "magic": Effect("magic.wav", 2, 0.10, 2),
+    "drink": Effect("drink.wav", 3, 0.25, 1),
+}
+MUSIC = "music.mp3"
+
+# --- AUDIO EN SEGUNDO PLANO ---
+class AudioSystem:
+    """
+    Un hilo inicia el mezclador y decodifica los efectos sin frenar el
+    primer frame; hasta que termina, play() no suena. La música (que
+    pygame ya lee por streaming) no se carga hasta start_music(), una vez
+    dibujada la pantalla de título. Los efectos suenan en un grupo fijo de
+    `channels` canales: si están todos ocupados se corta el de menor
+    prioridad que lleve más tiempo sonando, y si ninguno es de prioridad
+    menor o igual el efecto se descarta. Cada efecto tiene además un
+    intervalo mínimo y un máximo de copias simultáneas.
+    """
+    def __init__(self, effects=EFFECTS, music=MUSIC, channels=8, enabled=True, background=True):
+        self.effects = dict(effects)
+        self.music = music
+        self.channels = channels
+        self.enabled = enabled
+        self.sounds = {}                   # nombre -> Sound (solo los que se pudieron cargar)
+        self.ready = threading.Event()
+        self.load_ms = 0.0
+        self._pool = []                    # [Channel]
+        self._playing = {}                 # índice de canal -> (nombre, prioridad, inicio)
+        self._last = {}                    # nombre -> último disparo
+        self._music_wanted = False
+        self.music_started = False
+        self.stats = {"played": 0, "rate_limited": 0, "voice_limited": 0, "preempted": 0, "no_channel": 0, "not_ready": 0}
+        if enabled and background: threading.Thread(target=self.load, name="AudioSystem", daemon=True).start()
+
+    def load(self):
+        """Inicia el mezclador y decodifica los efectos. Fuera del hilo principal (con background=False, quien lo cree)."""
+        t0 = time.perf_counter()
+        try:
+            pygame.mixer.init()
+            pygame.mixer.set_num_channels(self.channels)
+            pygame.mixer.set_reserved(self.channels)     # Sound.play() suelto no nos quita canales
+            self._pool = [pygame.mixer.Channel(i) for i in range(self.channels)]
+        except pygame.error as e:
+            print(f"Audio desactivado: {e}")
+            self.enabled = False; self.ready.set()
+            return
+        for name, fx in self.effects.items():
+            if not os.path.exists(fx.path): continue
+            try:
+                snd = pygame.mixer.Sound(fx.path)
+                snd.set_volume(fx.volume)
+                self.sounds[name] = snd
+            except pygame.error: print(f"Error cargando {fx.path}")
+        self.load_ms = (time.perf_counter() - t0) * 1000
+        self.ready.set()
+
+    # --- Música ---
+    def start_music(self):
+        """Pide la música; empieza en cuanto el mezclador esté listo (ver poll)."""
+        self._music_wanted = True
+        self.poll()
+
+    def poll(self):
+        """Hilo principal, una vez por frame (GameEngine.run): arranca la música pendiente. Los canales se liberan en play()."""
+        if not self._music_wanted or self.music_started or not self.ready.is_set(): return
+        self.music_started = True
+        if not self.enabled or not os.path.exists(self.music): return
+        try:
+            pygame.mixer.music.load(self.music)
+            pygame.mixer.music.set_volume(1.0) # Volumen MAXIMO
+            pygame.mixer.music.play(-1)
+            print("Música OK")
+        except pygame.error: print("Error musica")
+
+    # --- Efectos ---
+    def play(self, name):
+        """Suena el efecto si lo permiten su límite y los canales libres. Devuelve True si sonó."""
+        if not self.enabled: return False
+        if not self.ready.is_set(): self.stats["not_ready"] += 1; return False
+        snd = self.sounds.get(name)
+        if snd is None: return False
+        fx = self.effects[name]
+        now = time.perf_counter()
+        if now - self._last.get(name, -1e9) < fx.min_interval: self.stats["rate_limited"] += 1; return False
+        busy = {i: v for i, v in self._playing.items() if self._pool[i].get_busy()}
+        self._playing = busy
+        if sum(1 for n, _, _ in busy.values() if n == name) >= fx.max_voices: self.stats["voice_limited"] += 1; return False
+        slot = next((i for i in range(len(self._pool)) if i not in busy), None)
+        if slot is None:
+            # El de menor prioridad y, entre iguales, el más antiguo
+            slot, (_, prio, _) = min(busy.items(), key=lambda kv: (kv[1][1], kv[1][2]))
+            if prio > fx.priority: self.stats["no_channel"] += 1; return False
+            self._pool[slot].stop(); self.stats["preempted"] += 1
+        self._pool[slot].play(snd)
+        self._playing[slot] = (name, fx.priority, now)
+        self._last[name] = now
+        self.stats["played"] += 1
+        return True
+
+    def report(self):
+        st = self.stats
+        if not self.enabled: return
+        print(f"Audio: {len(self.sounds)} efectos en {self.load_ms:.0f} ms (segundo plano) | {st['played']} reproducidos, "
+              f"{st['rate_limited']} por intervalo y {st['voice_limited']} por copias limitados, {st['preempted']} cortados, "
+              f"{st['no_channel']} sin canal, {st['not_ready']} antes de cargar")
@@ -0,0 +1,32 @@
+"""
+Utilidades compartidas por los benchmarks: percentiles, resumen de
+tiempos y escritura del JSON con los datos de la ejecución (commit,
+versiones) para poder comparar resultados entre commits.
+"""
+import json
+import platform
+import subprocess
+
+import pygame
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+def summarize(values_ms):
+    """Media, percentiles y máximo de una lista de tiempos en ms."""
+    if not values_ms: return {"n": 0}
+    return {"n": len(values_ms), "mean_ms": round(sum(values_ms) / len(values_ms), 4),
+            "p50_ms": round(percentile(values_ms, 50), 4), "p95_ms": round(percentile(values_ms, 95), 4),
+            "p99_ms": round(percentile(values_ms, 99), 4), "max_ms": round(max(values_ms), 4)}
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError): return None
+
+def write_json(path, benchmark, **payload):
+    data = {"benchmark": benchmark, "commit": git_commit(), "python": platform.python_version(),
+            "pygame": pygame.version.ver, "machine": platform.machine()}
+    data.update(payload)
+    with open(path, "w") as f: json.dump(data, f, indent=2)
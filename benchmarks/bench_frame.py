@@ -0,0 +1,257 @@
+"""
+Coste por fase de un frame (input, update, draw, draw_window, save) en
+escenarios guionizados, más micro-benchmarks de la persistencia.
+
+    python benchmarks/bench_frame.py [--frames 300] [--warmup 30] [--only stage_3,boss] [--json salida.json] [--baseline anterior.json]
+    python benchmarks/bench_frame.py --replay sesion.rpgi [--json salida.json]
+
+Escenarios: las 10 fases de levels_config jugadas por el bot de prueba
+(la 10 es el jefe), ráfagas de partículas y de proyectiles, las
+pantallas de menú y la generación de mapas. El jugador no puede morir y
+la meta de bajas es infinita, así que cada escenario mide siempre la
+misma situación.
+Persistencia: save_game_to_db (encolar, confirmado y sin cambios),
+guardado directo completo y de una columna, lote de 256 eventos de
+telemetría y load_player_from_db contra SQLite en memoria y en un
+fichero temporal.
+
+Usa el driver de vídeo dummy, no abre ventana ni necesita SQL Server.
+Con --baseline se imprime la variación del p95 respecto a otro JSON.
+Con --replay se mide, paso a paso, una sesión real grabada con
+`game_engine.py --record` (escenario "replay") en lugar de los guionizados.
+"""
+import argparse
+import json
+import os
+import sys
+import shutil
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("RPG_DB_BACKEND", "sqlite")
+os.environ.setdefault("RPG_SQLITE_PATH", ":memory:")
+JOURNAL_TMP = None
+if "RPG_JOURNAL_DIR" not in os.environ:         # no toca los diarios reales
+    JOURNAL_TMP = os.environ["RPG_JOURNAL_DIR"] = tempfile.mkdtemp(prefix="rpg_journal_")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT); os.chdir(ROOT)
+
+import game_engine
+from bench_common import summarize, write_json
+from simulation import chase_bot
+from storage import SqliteStorage
+from save_queue import SaveSnapshot
+from input_log import InputLog
+from stage_layout import stage_layout
+
+PHASES = ("input", "update", "nav", "draw", "draw_window", "save")   # nav: recálculo del campo de flujo, dentro de update
+clock = time.perf_counter
+
+# --- ESCENARIOS DE JUEGO ---
+def prepare(game, stage):
+    game.start_level(stage)
+    game.assets.wait()                 # las imágenes de la fase, fuera de la medida
+    game.target_kills = 10 ** 9
+    game.player_stats["MaxHP"] = game.player_stats["HP"] = 10 ** 9
+
+def play(game, frames, save_every, extra=None):
+    """Frames de juego con el bot; devuelve {fase: [ms]} y los máximos de entidades vistos."""
+    times = {p: [] for p in PHASES}
+    peak = {"enemies": 0, "particles": 0, "projectiles": 0, "floating_texts": 0}
+    for f in range(frames):
+        if extra: extra(game, f)
+        move, actions = chase_bot(game)
+        t0 = clock(); game.apply_input(move, actions)
+        nav = game.nav.stats["total_ms"]
+        t1 = clock(); game.update(); game.ticks += 1
+        t2 = clock(); game.draw_screen()
+        times["nav"].append(game.nav.stats["total_ms"] - nav)
+        t3 = clock(); game.draw_window()
+        t4 = clock()
+        times["input"].append((t1 - t0) * 1000); times["update"].append((t2 - t1) * 1000)
+        times["draw"].append((t3 - t2) * 1000); times["draw_window"].append((t4 - t3) * 1000)
+        if save_every and f % save_every == 0:
+            t5 = clock(); game.save_game_to_db(); times["save"].append((clock() - t5) * 1000)
+        peak["enemies"] = max(peak["enemies"], len(game.enemies)); peak["particles"] = max(peak["particles"], len(game.particles))
+        peak["projectiles"] = max(peak["projectiles"], len(game.projectiles) + len(game.enemy_projectiles))
+        peak["floating_texts"] = max(peak["floating_texts"], len(game.floating_texts))
+        if game.game_state != "playing": game.game_state = "playing"
+    return times, peak
+
+def play_log(game, log):
+    """Un frame por paso de la grabación, con las mismas fases que play()."""
+    times = {p: [] for p in PHASES}
+    peak = {"enemies": 0, "particles": 0, "projectiles": 0, "floating_texts": 0}
+    game.apply_sim_state(log.initial)
+    for kind, *args in log:
+        if kind == "start": game.start_level(args[0]); continue
+        if kind == "reset": game.reset_progress(); continue
+        t0 = clock(); game.apply_input(*args)
+        t1 = clock()
+        if game.game_state == "playing": game.update()
+        game.ticks += 1
+        t2 = clock(); game.draw_screen()
+        t3 = clock(); game.draw_window()
+        t4 = clock()
+        times["input"].append((t1 - t0) * 1000); times["update"].append((t2 - t1) * 1000)
+        times["draw"].append((t3 - t2) * 1000); times["draw_window"].append((t4 - t3) * 1000)
+        peak["enemies"] = max(peak["enemies"], len(game.enemies)); peak["particles"] = max(peak["particles"], len(game.particles))
+        peak["projectiles"] = max(peak["projectiles"], len(game.projectiles) + len(game.enemy_projectiles))
+        peak["floating_texts"] = max(peak["floating_texts"], len(game.floating_texts))
+    return times, peak
+
+def particle_burst(game, f):
+    if f % 10 == 0:
+        for _ in range(8): game.particles.emit(game.rng.randint(0, 800), game.rng.randint(100, 600), game_engine.RED, 50)
+
+def projectile_burst(game, f):
+    game.player_stats["Mana"] = 100
+    if f % 3 == 0:
+        for d in ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1), (1, -1), (-1, 1)):
+            game.last_dir = d; game.shoot()
+
+def scenarios():
+    for stage in range(1, 11):
+        yield ("boss" if stage == 10 else f"stage_{stage}"), stage, None
+    yield "particles", 5, particle_burst
+    yield "projectiles", 3, projectile_burst
+
+def play_menus(game, frames):
+    times = {p: [] for p in PHASES}
+    per_screen = max(1, frames // 5)
+    for state in ("title", "level_select", "paused", "victory", "game_over"):
+        if state in ("victory", "paused"): prepare(game, 1)
+        game.game_state = state; game.draw_screen()      # calienta la caché de textos
+        for _ in range(per_screen):
+            game.game_state = state
+            t0 = clock(); game.draw_screen()
+            t1 = clock(); game.draw_window()
+            t2 = clock()
+            times["draw"].append((t1 - t0) * 1000); times["draw_window"].append((t2 - t1) * 1000)
+    return times
+
+def row(name, stage, times, peak=None):
+    frame = [sum(parts) for parts in zip(*(times[p] for p in ("input", "update", "draw", "draw_window") if times[p]))]
+    return {"scenario": name, "stage": stage, "phases": {p: summarize(v) for p, v in times.items() if v},
+            "frame": summarize(frame), "peak": peak or {}}
+
+# --- PERSISTENCIA ---
+def bench_persistence(game, n):
+    results = []
+    tmp = tempfile.mkdtemp(prefix="rpg_bench_")
+    for label, path in (("sqlite_memory", ":memory:"), ("sqlite_file", os.path.join(tmp, "bench.db"))):
+        st = SqliteStorage(path)
+        old = game.storage, game.player_session
+        game.storage = st; game.player_session = st.session(game.username)
+        game.load_player_from_db()
+        timings = {"load_player_from_db": [], "storage.save_game": [], "storage.save_game(xp)": [], "save_game_to_db": [],
+                   "save_game_to_db+flush": [], "save_game_to_db(igual)": [], "storage.insert_events(256)": []}
+        pid = game.player_session.player_id
+        events = [("damage", 3, 25, "Goblin", i * 16) for i in range(256)]
+        for i in range(n):
+            t0 = clock(); game.load_player_from_db(); timings["load_player_from_db"].append((clock() - t0) * 1000)
+            snap = SaveSnapshot(1, 100, 100, i, 400, 300, 1.0, 3)
+            t0 = clock(); st.save_game(pid, snap); timings["storage.save_game"].append((clock() - t0) * 1000)
+            t0 = clock(); st.save_game(pid, snap, ("xp",)); timings["storage.save_game(xp)"].append((clock() - t0) * 1000)
+            # Cada guardado del juego lleva un cambio real (XP) para que no lo omita el DeltaTracker
+            game.player_stats["XP"] = 2 * i
+            t0 = clock(); game.save_game_to_db(); timings["save_game_to_db"].append((clock() - t0) * 1000)
+            game.save_queue.flush()
+            game.player_stats["XP"] = 2 * i + 1
+            t0 = clock(); game.save_game_to_db(); game.save_queue.flush(); timings["save_game_to_db+flush"].append((clock() - t0) * 1000)
+            t0 = clock(); game.save_game_to_db(); timings["save_game_to_db(igual)"].append((clock() - t0) * 1000)
+            t0 = clock(); st.insert_events(pid, events); timings["storage.insert_events(256)"].append((clock() - t0) * 1000)
+        game.storage, game.player_session = old; st.close()
+        for op, v in timings.items():
+            s = summarize(v)
+            results.append({"backend": label, "op": op, **s})
+            print(f"  {label:<13} {op:<26} media {s['mean_ms']:.3f} ms | p95 {s['p95_ms']:.3f} ms")
+    for f in os.listdir(tmp): os.remove(os.path.join(tmp, f))
+    os.rmdir(tmp)
+    return results
+
+# --- MAPAS ---
+def bench_layouts(seed, n=20):
+    """Generación de cada fase sin caché (obstáculos + posiciones de aparición) y acierto de caché."""
+    gen, cached = [], []
+    for stage in range(1, 11):
+        for i in range(n):
+            t0 = clock(); stage_layout.__wrapped__(stage, seed + i); gen.append((clock() - t0) * 1000)
+        stage_layout(stage, seed)
+        t0 = clock(); stage_layout(stage, seed); cached.append((clock() - t0) * 1000)
+    results = [{"op": "stage_layout", **summarize(gen)}, {"op": "stage_layout(caché)", **summarize(cached)}]
+    for r in results: print(f"  {r['op']:<20} media {r['mean_ms']:.3f} ms | p95 {r['p95_ms']:.3f} ms | máx {r['max_ms']:.3f} ms")
+    return results
+
+# --- COMPARACIÓN ---
+def compare(results, persistence, baseline_path):
+    with open(baseline_path) as f: base = json.load(f)
+    print(f"\nComparación con {baseline_path} (commit {base.get('commit')}), p95:")
+    old = {r["scenario"]: r for r in base.get("scenarios", [])}
+    for r in results:
+        b = old.get(r["scenario"])
+        if not b or not b["frame"].get("n"): continue
+        a_ms, b_ms = r["frame"]["p95_ms"], b["frame"]["p95_ms"]
+        print(f"  {r['scenario']:<12} {b_ms:7.2f} -> {a_ms:7.2f} ms ({(a_ms - b_ms) / b_ms * 100 if b_ms else 0:+.1f}%)")
+    old_p = {(r["backend"], r["op"]): r for r in base.get("persistence", [])}
+    for r in persistence:
+        b = old_p.get((r["backend"], r["op"]))
+        if not b: continue
+        print(f"  {r['backend']:<13} {r['op']:<24} {b['p95_ms']:.3f} -> {r['p95_ms']:.3f} ms")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=300)
+    ap.add_argument("--warmup", type=int, default=30, help="frames sin medir al empezar cada escenario")
+    ap.add_argument("--save-every", type=int, default=60, help="guardado de control cada N frames (0 = ninguno)")
+    ap.add_argument("--db-ops", type=int, default=200, help="repeticiones de cada operación de persistencia")
+    ap.add_argument("--only", help="escenarios a ejecutar, separados por comas (p.ej. stage_3,boss,menus,layouts,persistence)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", help="fichero donde escribir los resultados")
+    ap.add_argument("--baseline", help="JSON de una ejecución anterior para comparar")
+    ap.add_argument("--replay", help="grabación (.rpgi) a medir en lugar de los escenarios guionizados")
+    args = ap.parse_args()
+    only = set(args.only.split(",")) if args.only else None
+    log = InputLog.load(args.replay) if args.replay else None
+    if log: only = {"replay"}
+
+    game = game_engine.GameEngine(seed=log.seed if log else args.seed)
+    game.startup.wait(); game.assets.wait()
+    results = []
+    if log:
+        times, peak = play_log(game, log)
+        r = row("replay", None, times, peak); results.append(r)
+        print(f"{'replay':<12} {r['frame']['n']} pasos | frame p50 {r['frame']['p50_ms']:6.2f} p95 {r['frame']['p95_ms']:6.2f} "
+              f"p99 {r['frame']['p99_ms']:6.2f} ms | enemigos {peak['enemies']} partículas {peak['particles']}")
+    for name, stage, extra in scenarios():
+        if only and name not in only: continue
+        prepare(game, stage)
+        if args.warmup: play(game, args.warmup, 0, extra)
+        times, peak = play(game, args.frames, args.save_every, extra)
+        r = row(name, stage, times, peak); results.append(r)
+        ph = r["phases"]
+        print(f"{name:<12} frame p50 {r['frame']['p50_ms']:6.2f} p95 {r['frame']['p95_ms']:6.2f} ms | "
+              + " ".join(f"{p} {ph[p]['mean_ms']:.2f}" for p in PHASES if p in ph)
+              + f" | enemigos {peak['enemies']} partículas {peak['particles']} proyectiles {peak['projectiles']}")
+    if not only or "menus" in only:
+        r = row("menus", None, play_menus(game, args.frames)); results.append(r)
+        print(f"{'menus':<12} frame p50 {r['frame']['p50_ms']:6.2f} p95 {r['frame']['p95_ms']:6.2f} ms")
+    layouts = []
+    if not only or "layouts" in only:
+        print("Mapas:")
+        layouts = bench_layouts(args.seed)
+    persistence = []
+    if not only or "persistence" in only:
+        print("Persistencia:")
+        persistence = bench_persistence(game, args.db_ops)
+    game.close()
+    if JOURNAL_TMP: shutil.rmtree(JOURNAL_TMP, ignore_errors=True)
+
+    if args.json: write_json(args.json, "frame", frames=args.frames, seed=log.seed if log else args.seed,
+                             replay=args.replay, scenarios=results, layouts=layouts, persistence=persistence)
+    if args.baseline: compare(results, persistence, args.baseline)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Coste de las consultas de colisión frente al número de entidades.
+
+    python benchmarks/bench_spatial.py [--json salida.json]
+
+Compara la comprobación todos-contra-todos (lo que hacía update()) con la
+rejilla espacial: por cada entidad móvil se mueve, se reindexa y se busca
+con qué choca. Los tiempos son por frame.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pygame
+from spatial_grid import SpatialGrid
+
+W, H = 800, 600
+
+def make_world(n, rng):
+    rects = [pygame.Rect(rng.randint(0, W - 40), rng.randint(0, H - 40), rng.choice((20, 40, 50)), rng.choice((20, 40, 50))) for _ in range(n)]
+    vels = [(rng.uniform(-4, 4), rng.uniform(-4, 4)) for _ in range(n)]
+    return rects, vels
+
+def step(rects, vels):
+    for r, (vx, vy) in zip(rects, vels):
+        r.x = (r.x + vx) % W; r.y = (r.y + vy) % H
+
+def bench_all_pairs(n, frames, rng):
+    rects, vels = make_world(n, rng)
+    t = time.perf_counter(); pairs = 0
+    for _ in range(frames):
+        step(rects, vels)
+        for i, r in enumerate(rects): pairs += len(r.collidelistall(rects)) - 1
+    return (time.perf_counter() - t) / frames * 1000, pairs // frames
+
+def bench_grid(n, frames, rng, cell):
+    rects, vels = make_world(n, rng)
+    grid = SpatialGrid(cell)
+    for i, r in enumerate(rects): grid.insert(i, r, "e")
+    t = time.perf_counter(); pairs = 0
+    for _ in range(frames):
+        step(rects, vels)
+        for i in range(n): grid.update(i)
+        for i, r in enumerate(rects): pairs += len(grid.query_rect(r, exclude=i))
+    return (time.perf_counter() - t) / frames * 1000, pairs // frames
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--counts", default="50,100,200,500,1000,2000")
+    ap.add_argument("--frames", type=int, default=30)
+    ap.add_argument("--cell", type=int, default=64)
+    ap.add_argument("--json", help="fichero donde escribir los resultados")
+    args = ap.parse_args()
+
+    results = []
+    for n in [int(c) for c in args.counts.split(",")]:
+        brute_ms, brute_pairs = bench_all_pairs(n, args.frames, random.Random(n))
+        grid_ms, grid_pairs = bench_grid(n, args.frames, random.Random(n), args.cell)
+        results.append({"entities": n, "all_pairs_ms": round(brute_ms, 3), "grid_ms": round(grid_ms, 3),
+                        "pairs": brute_pairs, "grid_pairs": grid_pairs})
+        print(f"{n:>6} entidades | todos-contra-todos {brute_ms:8.2f} ms | rejilla {grid_ms:8.2f} ms")
+    if args.json:
+        with open(args.json, "w") as f: json.dump({"benchmark": "spatial", "cell": args.cell, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Coste por frame de update() + draw_game() con muchos enemigos a la vez.
+
+    python benchmarks/bench_waves.py [--enemies 200] [--frames 300] [--json salida.json]
+
+Usa el driver de vídeo dummy y la BD SQLite en memoria, así que no abre
+ventana ni necesita SQL Server.
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("RPG_DB_BACKEND", "sqlite")
+os.environ.setdefault("RPG_SQLITE_PATH", ":memory:")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT); os.chdir(ROOT)
+
+import game_engine
+from bench_common import percentile, write_json
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--enemies", type=int, default=200)
+    ap.add_argument("--frames", type=int, default=300)
+    ap.add_argument("--json", help="fichero donde escribir los resultados")
+    args = ap.parse_args()
+
+    game = game_engine.GameEngine()
+    game.startup.wait(); game.assets.wait()
+    results = []
+    for stage in (2, 3, 5, 10):
+        game.start_level(stage); game.assets.wait()
+        game.target_kills = 10 ** 9
+        game.player_stats["MaxHP"] = game.player_stats["HP"] = 10 ** 9
+        while len(game.enemies) < args.enemies: game.spawn_enemy()
+        update_ms, draw_ms = [], []
+        for _ in range(args.frames):
+            t0 = time.perf_counter(); game.update()
+            t1 = time.perf_counter(); game.draw_game()
+            t2 = time.perf_counter()
+            update_ms.append((t1 - t0) * 1000); draw_ms.append((t2 - t1) * 1000)
+        frame = [u + d for u, d in zip(update_ms, draw_ms)]
+        row = {"stage": stage, "enemy": game.levels_config[stage]["enemy"], "enemies": len(game.enemies),
+               "update_mean_ms": round(sum(update_ms) / len(update_ms), 3), "draw_mean_ms": round(sum(draw_ms) / len(draw_ms), 3),
+               "frame_p50_ms": round(percentile(frame, 50), 3), "frame_p95_ms": round(percentile(frame, 95), 3)}
+        results.append(row)
+        print(f"Fase {stage:>2} ({row['enemy']:<6}) {row['enemies']} enemigos | update {row['update_mean_ms']:.2f} ms | "
+              f"draw {row['draw_mean_ms']:.2f} ms | p95 {row['frame_p95_ms']:.2f} ms (presupuesto {1000 / game_engine.FPS:.1f} ms)")
+    game.save_queue.stop(); game.storage.close()
+    if args.json: write_json(args.json, "waves", results=results)
+
+if __name__ == "__main__":
+    main()
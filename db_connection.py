@@ -1,13 +1,16 @@
 import pyodbc
+import threading
+import time
+from contextlib import contextmanager
 from typing import Optional
 
-def get_db_connection(server: str = r"DESKTOP-GKI5BE3\SQLEXPRESS", 
-                      database: str = "RetroRPG", 
+def get_db_connection(server: str = r"DESKTOP-GKI5BE3\SQLEXPRESS",
+                      database: str = "RetroRPG",
                       trusted_connection: bool = True) -> Optional[pyodbc.Connection]:
     """
     Establece conexión a SQL Server.
     """
-    
+
     # Cadena de conexión segura
     connection_string = (
         f"DRIVER={{ODBC Driver 17 for SQL Server}};"
@@ -24,6 +27,132 @@ def get_db_connection(server: str = r"DESKTOP-GKI5BE3\SQLEXPRESS",
         print(f"Database connection error: {e}")
         return None
 
+# --- POOL DE CONEXIONES ---
+class ConnectionPool:
+    """
+    Pool acotado de conexiones reutilizables. Las conexiones ociosas se
+    validan con SELECT 1 antes de prestarlas y se reemplazan si fallan.
+    """
+    def __init__(self, factory=get_db_connection, max_size: int = 4,
+                 health_check_interval: float = 30.0, checkout_timeout: float = 5.0):
+        self.factory = factory
+        self.max_size = max_size
+        self.health_check_interval = health_check_interval
+        self.checkout_timeout = checkout_timeout
+        self._idle = []          # [(conexion, ultima_validacion)]
+        self._open = 0           # conexiones vivas (ociosas + prestadas)
+        self._cond = threading.Condition()
+        self.stats = {"hits": 0, "misses": 0, "waits": 0, "wait_time": 0.0,
+                      "reconnects": 0, "failures": 0, "discarded": 0}
+
+    def _is_alive(self, conn) -> bool:
+        try:
+            c = conn.cursor(); c.execute("SELECT 1"); c.fetchone(); c.close()
+            return True
+        except pyodbc.Error:
+            return False
+
+    def _discard(self, conn):
+        try: conn.close()
+        except pyodbc.Error: pass
+        with self._cond: self.stats["discarded"] += 1
+
+    def _connect(self):
+        conn = self.factory()
+        if conn is None:
+            with self._cond:
+                self._open -= 1; self.stats["failures"] += 1; self._cond.notify()
+        return conn
+
+    def checkout(self) -> Optional[pyodbc.Connection]:
+        """Presta una conexión (o None si la BD no responde)."""
+        start = time.perf_counter()
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, checked = self._idle.pop()
+                    break
+                if self._open < self.max_size:
+                    self._open += 1; self.stats["misses"] += 1
+                    conn = None
+                    break
+                remaining = self.checkout_timeout - (time.perf_counter() - start)
+                if remaining <= 0:
+                    self.stats["failures"] += 1
+                    return None
+                waited = True
+                self._cond.wait(remaining)
+            if waited:
+                self.stats["waits"] += 1
+                self.stats["wait_time"] += time.perf_counter() - start
+
+        if conn is None:
+            return self._connect()
+
+        # Conexión reutilizada: validar si lleva tiempo ociosa
+        if time.monotonic() - checked > self.health_check_interval and not self._is_alive(conn):
+            self._discard(conn)
+            with self._cond: self.stats["reconnects"] += 1
+            return self._connect()
+        with self._cond: self.stats["hits"] += 1
+        return conn
+
+    def checkin(self, conn, broken: bool = False):
+        """Devuelve la conexión al pool, descartándola si quedó rota."""
+        if not broken:
+            try: conn.rollback()
+            except pyodbc.Error: broken = True
+        with self._cond:
+            if broken:
+                self._open -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if broken: self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.checkout()
+        if conn is None:
+            yield None
+            return
+        broken = False
+        try:
+            yield conn
+        except (pyodbc.OperationalError, pyodbc.InterfaceError):
+            # Fallo de la conexión: se descarta. Un error de la sentencia (tabla que falta,
+            # restricción...) solo hace rollback en checkin y la conexión vuelve al pool
+            broken = True
+            raise
+        finally:
+            self.checkin(conn, broken)
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn, _ in idle:
+            try: conn.close()
+            except pyodbc.Error: pass
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None: _pool = ConnectionPool()
+        return _pool
+
+def db_session():
+    """Context manager: `with db_session() as conn:` (conn puede ser None)."""
+    return get_pool().connection()
+
+def pool_stats() -> dict:
+    pool = get_pool()
+    with pool._cond: return dict(pool.stats)
+
 # Bloque de prueba (opcional, por si quieres ejecutar este archivo solo)
 if __name__ == "__main__":
     conn = get_db_connection()
@@ -31,4 +160,4 @@ if __name__ == "__main__":
         print("¡Conexión exitosa!")
         conn.close()
     else:
-        print("Falló la conexión.")
\ No newline at end of file
+        print("Falló la conexión.")
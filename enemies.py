@@ -0,0 +1,141 @@
+import random
+
+import numpy as np
+import pygame
+
+ENEMY_TYPES = ["Goblin", "Brain", "Shadow", "Ogre"]
+TYPE_ID = {name: i for i, name in enumerate(ENEMY_TYPES)}
+GOBLIN, BRAIN, SHADOW, OGRE = range(4)
+
+# --- TABLA DE ENEMIGOS (COLUMNAS) ---
+class EnemyTable:
+    """
+    Todos los enemigos vivos de la fase en columnas de NumPy. Los huecos de
+    los muertos se reutilizan, así que el índice de fila (slot) es estable
+    mientras el enemigo vive y sirve de clave en la rejilla espacial.
+    """
+    def __init__(self, bounds, capacity=256, rng=None):
+        self.width, self.height, self.top = bounds
+        self.rng = rng or random.Random()
+        self.capacity = 0
+        self.rects = []                      # un Rect por slot (lo usan rejilla y dibujo)
+        self.names = []                      # nombre del catálogo por slot
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        def col(dtype, old=None):
+            arr = np.zeros(capacity, dtype)
+            if old is not None: arr[:len(old)] = old
+            return arr
+        first = self.capacity == 0
+        for name, dtype in (("kind", np.int8), ("x", np.float64), ("y", np.float64), ("w", np.int16), ("h", np.int16),
+                            ("hp", np.int32), ("max_hp", np.int32), ("attack", np.int32), ("speed", np.float64),
+                            ("timer", np.int32), ("alive", np.bool_), ("prev_x", np.float64), ("prev_y", np.float64)):
+            setattr(self, name, col(dtype, None if first else getattr(self, name)))
+        self.rects += [pygame.Rect(0, 0, 0, 0) for _ in range(capacity - self.capacity)]
+        self.names += [""] * (capacity - self.capacity)
+        self.capacity = capacity
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    def slots(self):
+        return np.flatnonzero(self.alive).tolist()
+
+    def clear(self):
+        self.alive[:] = False
+
+    def add(self, tmpl, x, y, w, h):
+        free = np.flatnonzero(~self.alive)
+        if not len(free):
+            self._grow(self.capacity * 2); free = np.flatnonzero(~self.alive)
+        i = int(free[0])
+        self.kind[i] = TYPE_ID.get(tmpl["Name"], GOBLIN)
+        self.x[i], self.y[i], self.w[i], self.h[i] = x, y, w, h
+        self.prev_x[i], self.prev_y[i] = x, y
+        self.hp[i] = tmpl["HP"]; self.max_hp[i] = tmpl["MaxHP"]; self.attack[i] = tmpl["Attack"]
+        self.speed[i] = tmpl.get("Speed", 2)
+        self.timer[i] = self.rng.randint(0, 60)   # desfasa disparos/teletransportes de una oleada
+        self.alive[i] = True
+        self.names[i] = tmpl["Name"]
+        self.rects[i].update(int(x), int(y), w, h)
+        return i
+
+    def snapshot(self):
+        """Guarda las posiciones actuales como las del paso anterior (para interpolar el dibujo)."""
+        np.copyto(self.prev_x, self.x); np.copyto(self.prev_y, self.y)
+
+    def draw_pos(self, i, alpha):
+        """Posición interpolada entre el paso anterior y el actual."""
+        x = self.prev_x[i] + (self.x[i] - self.prev_x[i]) * alpha
+        y = self.prev_y[i] + (self.y[i] - self.prev_y[i]) * alpha
+        return int(x), int(y)
+
+    def kill(self, i):
+        self.alive[i] = False
+
+    def update(self, px, py, nav=None):
+        """
+        Un paso de IA para todos a la vez. Devuelve (disparos, teletransportes):
+        disparos = [(x, y, vx, vy)] de los Brain, teletransportes = [(x, y)] de los Shadow.
+        Con nav (NavGrid ya actualizada con el jugador) los que persiguen siguen
+        su campo de flujo rodeando obstáculos y los Brain huyen por su distancia.
+        """
+        idx = np.flatnonzero(self.alive)
+        if not len(idx): return [], []
+        kind = self.kind[idx]
+        x = self.x[idx]; y = self.y[idx]; speed = self.speed[idx].copy()
+        dist = np.hypot(px - x, py - y)
+        dir_x = np.where(px > x, 1.0, -1.0); dir_y = np.where(py > y, 1.0, -1.0)
+        away_x, away_y = -dir_x, -dir_y
+        brain = kind == BRAIN; shadow = kind == SHADOW
+        near = brain & (dist < 200)
+        if nav is not None:
+            # Campo de la celda del centro; sin paso (misma celda o inalcanzable) se va en línea recta
+            fx, fy, ax, ay, path = nav.sample(x + self.w[idx] * 0.5, y + self.h[idx] * 0.5).T
+            has = (fx != 0) | (fy != 0)
+            dir_x = np.where(has, fx, dir_x); dir_y = np.where(has, fy, dir_y)
+            if brain.any():
+                has = (ax != 0) | (ay != 0)
+                away_x = np.where(has, ax, away_x); away_y = np.where(has, ay, away_y)
+                near = brain & (np.minimum(path, dist) < 200)
+
+        speed[kind == OGRE] = 1.0
+        speed[shadow] *= 1.2
+
+        # Perseguir en ambos ejes (Goblin, Shadow, Ogre)
+        step_x = dir_x * speed; step_y = dir_y * speed
+        # Brain: huye si está cerca, si no solo se acerca en horizontal
+        step_x[near] = (away_x * speed)[near]; step_y[near] = (away_y * speed)[near]
+        step_y[brain & ~near] = 0
+        # Como los Rect de antes: posiciones enteras truncadas
+        x = np.trunc(x + step_x); y = np.trunc(y + step_y)
+
+        timer = self.timer[idx] + (brain | shadow)
+        shots, teleports = [], []
+
+        fire = brain & (timer > 90)
+        timer[fire] = 0
+        for k in np.flatnonzero(fire).tolist():
+            dx, dy = px - x[k], py - y[k]
+            mag = (dx * dx + dy * dy) ** 0.5
+            if mag != 0: shots.append((x[k] + 20, y[k] + 20, dx / mag * 7, dy / mag * 7))
+
+        jump = shadow & (timer > 120) & (dist < 150)
+        timer[jump] = 0
+        for k in np.flatnonzero(jump).tolist():
+            x[k] = max(50, min(px + self.rng.choice([-80, 80]), self.width - 50))
+            y[k] = max(100, min(py + self.rng.choice([-80, 80]), self.height - 50))
+            teleports.append((x[k], y[k]))
+
+        w = self.w[idx]; h = self.h[idx]
+        x = np.clip(x, 0, self.width - w); y = np.clip(y, self.top, self.height - h)
+        self.x[idx] = x; self.y[idx] = y; self.timer[idx] = timer
+        if teleports:                        # el salto no se interpola
+            jumped = idx[jump]
+            self.prev_x[jumped] = x[jump]; self.prev_y[jumped] = y[jump]
+
+        rects = self.rects
+        for i, xi, yi in zip(idx.tolist(), x.astype(np.int32).tolist(), y.astype(np.int32).tolist()):
+            r = rects[i]; r.x = xi; r.y = yi
+        return shots, teleports
@@ -1,10 +1,30 @@
 import pygame
-import pyodbc
 import random
 import sys
 import math
 import os
-from db_connection import get_db_connection
+import time
+import argparse
+from storage import get_storage
+from monster_cache import MonsterCatalog, CACHE_PATH
+from asset_manager import AssetManager
+from asset_bundle import AssetBundle
+from audio import AudioSystem
+from text_cache import text_cache
+from particles import ParticleSystem
+from spatial_grid import SpatialGrid
+from enemies import EnemyTable
+from presentation import Presenter
+from renderer import StageRenderer
+from save_queue import DeltaTracker, SaveDelta, SaveQueue, SaveSnapshot, merge_deltas
+from save_journal import JOURNAL_DIR, SaveJournal, journal_path
+from telemetry import EventBuffer
+from stage_layout import pick_spawn, stage_layout
+from navigation import NavGrid
+from startup import StartupPipeline
+from simulation import FixedStep, TICK_RATE, chase_bot
+from profiler import FrameProfiler
+from input_log import InputRecorder, InputLog
 
 # --- CONFIGURACIÓN ---
 GAME_WIDTH = 800
@@ -26,6 +46,21 @@ GRAY = (127, 140, 141)
 DARK_OVERLAY = (0, 0, 0, 150)
 
 FPS = 60
+INTEGER_SCALING = False   # True: escala entera (píxel perfecto) y redibujado parcial de la ventana
+
+# Imágenes y su tamaño final en pantalla
+IMAGE_ASSETS = {
+    "bg_forest.png": (800,600), "bg_cave.png": (800,600), "bg_dungeon.png": (800,600),
+    "tree.png": (60,80), "rock.png": (50,50), "pillar.png": (50,80),
+    "player.png": (50,50), "slash.png": (80,80), "fireball.png": (30,30),
+    "goblin.png": (50,50), "shadow.png": (50,50), "ogre.png": (180,180), "brain.png": (45,45)
+}
+
+DEFAULT_PLAYER = "Player1"   # cuenta de la BD cuando no se elige jugador (RPG_PLAYER / --player)
+
+ENEMY_IMAGES = {"Goblin": "goblin.png", "Shadow": "shadow.png", "Brain": "brain.png", "Ogre": "ogre.png"}
+# Siempre residentes: jugador, ataques y el fondo de los menús; el resto se carga por fase
+GLOBAL_IMAGES = ("player.png", "slash.png", "fireball.png", "bg_forest.png")
 
 # --- CLASES VISUALES ---
 class FloatingText:
@@ -39,58 +74,52 @@ class FloatingText:
         self.y -= 1; self.timer -= 1
     def draw(self, surface):
         if self.timer > 0:
-            shadow = self.font.render(str(self.text), True, BLACK)
-            text = self.font.render(str(self.text), True, self.color)
-            surface.blit(shadow, (self.x + 2, self.y + 2))
-            surface.blit(text, (self.x, self.y))
-
-class Particle:
-    def __init__(self, x, y, color):
-        self.x, self.y = x, y
-        self.color = color
-        self.size = random.randint(4, 8)
-        self.life = random.randint(15, 30)
-        self.vx, self.vy = random.uniform(-3, 3), random.uniform(-3, 3)
-    def update(self):
-        self.x += self.vx; self.y += self.vy; self.life -= 1; self.size -= 0.1
-    def draw(self, surface):
-        if self.life > 0 and self.size > 0:
-            pygame.draw.rect(surface, self.color, (self.x, self.y, self.size, self.size))
+            surface.blit(text_cache.render_shadowed(self.font, self.text, self.color, BLACK, 2), (self.x, self.y))
 
 # --- MOTOR PRINCIPAL ---
 class GameEngine:
-    def __init__(self):
-        pygame.init()
-        pygame.mixer.init()
+    """
+    headless=True: sin ventana, sin audio y con BD SQLite en memoria; la
+    simulación avanza con step() tan rápido como dé la CPU. clock (segundos)
+    y seed permiten inyectar el reloj del paso fijo y la semilla del azar.
+    record: fichero donde grabar los comandos de la sesión (ver input_log).
+    player: nombre del jugador en la BD (cada uno con su partida).
+    """
+    def __init__(self, headless=False, seed=None, clock=None, storage=None, record=None, player=None):
+        self.startup = StartupPipeline()
+        self.headless = headless
+        self.username = player or os.environ.get("RPG_PLAYER") or DEFAULT_PLAYER
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)   # siempre hay semilla (grabación)
+        self.rng = random.Random(self.seed)
+        self.ticks = 0
+        self.stepper = FixedStep(clock or time.perf_counter)
+        if headless: pygame.font.init()
+        else:
+            pygame.display.init(); pygame.font.init()   # el mezclador lo inicia AudioSystem en su hilo
         
-        self.screen = pygame.display.set_mode((GAME_WIDTH, GAME_HEIGHT), pygame.RESIZABLE)
         self.canvas = pygame.Surface((GAME_WIDTH, GAME_HEIGHT))
-        pygame.display.set_caption("Retro RPG - FINAL VERSION")
+        if headless: self.screen = self.presenter = None
+        else:
+            self.screen = pygame.display.set_mode((GAME_WIDTH, GAME_HEIGHT), pygame.RESIZABLE)
+            pygame.display.set_caption("Retro RPG - FINAL VERSION")
+            self.presenter = Presenter(self.canvas, integer_scaling=INTEGER_SCALING)
+        self.renderer = StageRenderer((GAME_WIDTH, GAME_HEIGHT), DARK_OVERLAY)
         self.clock = pygame.time.Clock()
         
-        # Fuentes
-        try:
-            self.font_s = pygame.font.Font("PressStart2P.ttf", 12)
-            self.font_m = pygame.font.Font("PressStart2P.ttf", 20)
-            self.font_l = pygame.font.Font("PressStart2P.ttf", 40)
-            self.font_xl = pygame.font.Font("PressStart2P.ttf", 60)
-        except:
-            self.font_s = pygame.font.Font(None, 24)
-            self.font_m = pygame.font.Font(None, 36)
-            self.font_l = pygame.font.Font(None, 74)
-            self.font_xl = pygame.font.Font(None, 100)
-        
         self.running = True
         self.game_state = "title"
 
         # Jugador
         self.player_x, self.player_y = 400, 300
         self.player_rect = pygame.Rect(400, 300, 40, 40)
-        self.player_stats = {"Username": "Hero", "Level": 1, "HP": 100, "MaxHP": 100, "Mana": 100, "MaxMana": 100, "XP": 0}
+        self.player_prev = (self.player_x, self.player_y)   # posición del paso anterior (interpolación)
+        self.player_stats = {"Username": self.display_name(), "Level": 1, "HP": 100, "MaxHP": 100, "Mana": 100, "MaxMana": 100, "XP": 0}
         self.potions = 3
         self.player_speed = 5
         self.facing_right = True
         self.last_dir = (1, 0)
+        self.frame_move = (0, 0)           # teclado leído una vez por frame
+        self.pending_actions = []          # acciones de teclado para el siguiente paso
 
         # Progreso
         self.current_stage = 1
@@ -99,131 +128,180 @@ class GameEngine:
         self.max_unlocked_level = 1
         
         self.levels_config = {
-            1: {"name": "Bosque Inicio", "bg": "bg_forest.png", "obs": "tree.png", "enemy": "Goblin", "req": 3},
-            2: {"name": "Espesura", "bg": "bg_forest.png", "obs": "tree.png", "enemy": "Goblin", "req": 4},
-            3: {"name": "Bosque Oscuro", "bg": "bg_forest.png", "obs": "tree.png", "enemy": "Brain", "req": 4},
-            4: {"name": "Cueva Entrada", "bg": "bg_cave.png", "obs": "rock.png", "enemy": "Brain", "req": 5},
-            5: {"name": "Profundidades", "bg": "bg_cave.png", "obs": "rock.png", "enemy": "Shadow", "req": 5},
-            6: {"name": "Nido Sombras", "bg": "bg_cave.png", "obs": "rock.png", "enemy": "Shadow", "req": 6},
-            7: {"name": "Mazmorra", "bg": "bg_dungeon.png", "obs": "pillar.png", "enemy": "Brain", "req": 7},
-            8: {"name": "Pasillo Lava", "bg": "bg_dungeon.png", "obs": "pillar.png", "enemy": "Shadow", "req": 8},
-            9: {"name": "Sala Real", "bg": "bg_dungeon.png", "obs": "pillar.png", "enemy": "Shadow", "req": 10},
-            10: {"name": "BOSS FINAL", "bg": "bg_dungeon.png", "obs": "pillar.png", "enemy": "Ogre", "req": 1}
+            1: {"name": "Bosque Inicio", "bg": "bg_forest.png", "obs": "tree.png", "enemy": "Goblin", "req": 3, "wave": 1},
+            2: {"name": "Espesura", "bg": "bg_forest.png", "obs": "tree.png", "enemy": "Goblin", "req": 4, "wave": 2},
+            3: {"name": "Bosque Oscuro", "bg": "bg_forest.png", "obs": "tree.png", "enemy": "Brain", "req": 4, "wave": 2},
+            4: {"name": "Cueva Entrada", "bg": "bg_cave.png", "obs": "rock.png", "enemy": "Brain", "req": 5, "wave": 3},
+            5: {"name": "Profundidades", "bg": "bg_cave.png", "obs": "rock.png", "enemy": "Shadow", "req": 5, "wave": 3},
+            6: {"name": "Nido Sombras", "bg": "bg_cave.png", "obs": "rock.png", "enemy": "Shadow", "req": 6, "wave": 4},
+            7: {"name": "Mazmorra", "bg": "bg_dungeon.png", "obs": "pillar.png", "enemy": "Brain", "req": 7, "wave": 4},
+            8: {"name": "Pasillo Lava", "bg": "bg_dungeon.png", "obs": "pillar.png", "enemy": "Shadow", "req": 8, "wave": 5},
+            9: {"name": "Sala Real", "bg": "bg_dungeon.png", "obs": "pillar.png", "enemy": "Shadow", "req": 10, "wave": 6},
+            10: {"name": "BOSS FINAL", "bg": "bg_dungeon.png", "obs": "pillar.png", "enemy": "Ogre", "req": 1, "wave": 1}
         }
 
         self.difficulty_mult = 1.0 
         self.saving_icon_timer = 0
-        self.last_damage_time = 0
+        self.last_damage_time = -math.inf
+        self.stage_started_ms = 0
         self.slash_timer = 0
         
         self.projectiles = []
         self.floating_texts = []
-        self.particles = []
+        self.particles = ParticleSystem(seed=self.seed)
         self.obstacles = []
-        self.monster_catalog = []
+        self.layout = None             # StageLayout de la fase actual (cacheado por fase y semilla)
+        self.nav = NavGrid((GAME_WIDTH, GAME_HEIGHT))   # campo de flujo hacia el jugador, compartido por los enemigos
+        self.grid = SpatialGrid(64)
         self.images = {}
-        self.sounds = {}
+        self.assets = None
+        self.audio = AudioSystem(enabled=not headless, background=False)
+        self.recorder = None
         self.enemy_projectiles = []
-        self.enemy_action_timer = 0
-
+        self.enemies = EnemyTable((GAME_WIDTH, GAME_HEIGHT, 100), rng=self.rng)
+        self.storage = storage or (get_storage("sqlite", path=":memory:") if headless else get_storage())
+        self.player_session = self.storage.session(self.username)
+        # Solo se encolan las columnas que cambiaron; la posición sola, como mucho cada 10 s de simulación
+        self.save_tracker = DeltaTracker(10.0, clock=lambda: self.ticks / TICK_RATE)
+        self.save_queue = SaveQueue(self.write_save, merge=merge_deltas, on_drop=self.save_tracker.invalidate)
+        self.events = EventBuffer(self.write_events)   # telemetría de juego, se inserta por lotes en segundo plano
+        # Diario local: cada guardado queda en disco aunque la BD no responda y se le reenvía después
+        self.journal = None
+        if JOURNAL_DIR and not headless:
+            self.journal = SaveJournal(journal_path(JOURNAL_DIR, self.username), replay=self.replay_journal)
+        self.text_cache = text_cache
+        # RPG_PROFILE=1 graba desde el arranque; RPG_PROFILE=perfil.csv / .jsonl además exporta (F3: gráfica)
+        profile = os.environ.get("RPG_PROFILE", "")
+        self.profiler = FrameProfiler(self.storage, nav=self.nav, path=profile if profile.endswith((".csv", ".jsonl")) else None)
+        if profile: self.profiler.enable()
+
+        # Arranque concurrente: el título sale con las fuentes y lo demás llega por detrás (run).
+        # Fuentes e imágenes en el hilo principal, una por frame; audio y BD cada uno en su hilo
         print("--- CARGANDO ---")
-        self.load_all_assets()
-        self.load_player_from_db()
-        self.load_monsters_from_db()
-
-    def load_image(self, name, size):
+        st = self.startup
+        st.add("fonts", self.load_fonts, main_thread=True)
+        st.add("assets", self.load_all_assets, main_thread=True)
+        if not headless: st.add("audio", self.audio.load)
+        st.add("player", self.load_player_from_db)
+        st.add("catalog", self.load_monsters_from_db)
+        if record: st.add("recorder", lambda: self.start_recorder(record), deps=("player", "catalog"))
+        self.play_gate = tuple(n for n in ("fonts", "assets", "player", "catalog", "recorder") if n in st.tasks)   # "JUGAR"
+        st.start()
+        if headless: st.wait()
+
+    def load_fonts(self):
         try:
-            img = pygame.image.load(name).convert_alpha()
-            return pygame.transform.scale(img, size)
-        except: return None
+            self.font_s = pygame.font.Font("PressStart2P.ttf", 12)
+            self.font_m = pygame.font.Font("PressStart2P.ttf", 20)
+            self.font_l = pygame.font.Font("PressStart2P.ttf", 40)
+            self.font_xl = pygame.font.Font("PressStart2P.ttf", 60)
+        except:
+            self.font_s = pygame.font.Font(None, 24)
+            self.font_m = pygame.font.Font(None, 36)
+            self.font_l = pygame.font.Font(None, 74)
+            self.font_xl = pygame.font.Font(None, 100)
 
-    def load_sound(self, name):
-        if os.path.exists(name):
-            try: return pygame.mixer.Sound(name)
-            except: return None
-        return None
+    def start_recorder(self, path):
+        self.recorder = InputRecorder(path, self.seed, self.sim_state())
+
+    def stage_images(self, stage):
+        conf = self.levels_config.get(stage)
+        return (conf["bg"], conf["obs"], ENEMY_IMAGES.get(conf["enemy"], "goblin.png")) if conf else ()
 
     def load_all_assets(self):
-        assets = {
-            "bg_forest.png": (800,600), "bg_cave.png": (800,600), "bg_dungeon.png": (800,600),
-            "tree.png": (60,80), "rock.png": (50,50), "pillar.png": (50,80),
-            "player.png": (50,50), "slash.png": (80,80), "fireball.png": (30,30),
-            "goblin.png": (50,50), "shadow.png": (50,50), "ogre.png": (180,180), "brain.png": (45,45)
-        }
-        for name, size in assets.items(): self.images[name] = self.load_image(name, size)
-        
-        # Audio Seguro
-        if os.path.exists("music.mp3"):
-            try:
-                pygame.mixer.music.load("music.mp3")
-                pygame.mixer.music.set_volume(1.0) # Volumen MAXIMO
-                pygame.mixer.music.play(-1)
-                print("Música OK")
-            except: print("Error musica")
-        
-        self.sounds["hit"] = self.load_sound("hit.wav")
-        self.sounds["magic"] = self.load_sound("magic.wav")
-        self.sounds["drink"] = self.load_sound("drink.wav")
+        # Las imágenes se cargan por fase: al arrancar solo las globales y se precargan las de la fase 1.
+        # Del paquete pre-horneado (mmap) llegan al momento; lo que falte o esté desfasado se decodifica
+        # en paralelo y mientras tanto vale None y se dibuja sin ello
+        self.bundle = None if self.headless else AssetBundle.open()
+        self.assets = AssetManager(IMAGE_ASSETS, self.bundle, pinned=GLOBAL_IMAGES)
+        self.images = self.assets.images
+        if self.headless: return
+        self.assets.enter_stage((), self.stage_images(1))
+        if self.bundle: print(f"Paquete de assets: {self.bundle.zero_copy} imágenes sin copia")
+
+    def poll_assets(self):
+        if self.assets and not self.assets.done and self.assets.poll(): self.renderer.invalidate()
+
+    def display_name(self):
+        return "Hero" if self.username == DEFAULT_PLAYER else self.username
 
     def load_monsters_from_db(self):
-        conn = get_db_connection()
-        if conn:
-            try:
-                c = conn.cursor()
-                c.execute("SELECT MonsterName, BaseHP, BaseAttack, BaseSpeed FROM MonsterCatalog")
-                for r in c.fetchall(): self.monster_catalog.append({"Name": r[0], "HP": r[1], "MaxHP": r[1], "Attack": r[2], "Speed": r[3]})
-                conn.close()
-            except: pass
-        if not self.monster_catalog: self.monster_catalog = [{"Name": "Goblin", "HP": 30, "MaxHP": 30, "Attack": 5, "Speed": 2}]
+        self.catalog = MonsterCatalog(self.storage, self.levels_config, self.difficulty_mult, None if self.headless else CACHE_PATH)
+        self.catalog.load()
 
     def load_player_from_db(self):
-        conn = get_db_connection()
-        if conn:
-            try:
-                c = conn.cursor()
-                c.execute("SELECT PlayerID FROM Players WHERE Username = 'Player1'")
-                if not c.fetchone():
-                    c.execute("INSERT INTO Players (Username, PasswordHash) VALUES ('Player1', '1234')"); conn.commit()
-                    c.execute("SELECT PlayerID FROM Players WHERE Username = 'Player1'"); pid = c.fetchone()[0]
-                    c.execute("INSERT INTO SaveGames (PlayerID, CurrentHP, MaxHP, PositionX, PositionY, Level, ExperiencePoints, PositionZ) VALUES (?, 100, 100, 400, 300, 1, 0, 1.0)", pid); conn.commit()
-                
-                c.execute("SELECT Level, CurrentHP, MaxHP, ExperiencePoints, PositionZ FROM SaveGames s JOIN Players p ON s.PlayerID = p.PlayerID WHERE p.Username = 'Player1'")
-                data = c.fetchone()
-                if data:
-                    self.player_stats.update({"Level": data[0], "HP": data[1], "MaxHP": data[2], "XP": data[3]})
-                    self.max_unlocked_level = int(data[4]) if data[4] else 1
-                    if self.player_stats["HP"] <= 0: self.player_stats["HP"] = self.player_stats["MaxHP"]
-                conn.close()
-            except Exception as e: print(f"Error SQL: {e}")
+        data = None
+        try:
+            data = self.player_session.load()
+            if data:
+                self.player_stats.update({"Level": data["Level"], "HP": data["HP"], "MaxHP": data["MaxHP"], "XP": data["XP"]})
+                self.max_unlocked_level = int(data["Unlocked"]) if data["Unlocked"] else 1
+                if data["Potions"] is not None: self.potions = data["Potions"]
+                # Lo que hay en la BD (la posición no se carga: el primer guardado la escribe)
+                self.save_tracker.set_base(SaveSnapshot(data["Level"], data["HP"], data["MaxHP"], data["XP"], None, None,
+                                                        data["Unlocked"], data["Potions"]))
+                if self.player_stats["HP"] <= 0: self.player_stats["HP"] = self.player_stats["MaxHP"]
+        except Exception as e: print(f"Error SQL: {e}")
+        self.recover_from_journal(bool(data))
+
+    def recover_from_journal(self, db_loaded):
+        # El diario manda si tiene guardados que la BD no confirmó o si la BD no respondió
+        j = self.journal
+        if not j or not j.latest or (db_loaded and not j.pending): return
+        seq, _, snap = j.latest
+        self.player_stats.update({"Level": snap.level, "HP": snap.hp or snap.max_hp, "MaxHP": snap.max_hp, "XP": snap.xp})
+        self.max_unlocked_level = int(snap.unlocked) or 1; self.potions = snap.potions
+        self.save_tracker.invalidate()
+        if j.pending: self.save_queue.submit(SaveDelta(snap, None, seq))
+        print(f"Partida recuperada del diario local (guardado {seq}{', pendiente de subir a la BD' if j.pending else ''})")
+
+    def replay_journal(self, seq, snap):
+        # Hilo del diario: reintenta subir el último guardado si la cola está libre
+        if not self.save_queue.busy: self.save_queue.submit(SaveDelta(snap, None, seq))
 
     def save_game_to_db(self):
+        # No bloquea: se encola lo que cambió desde el último guardado y lo escribe el hilo de guardado.
+        # Hasta que llegue la partida de la BD no se guarda nada (se pisaría con los valores iniciales)
+        if not self.startup.done("player"): return
+        hp_save = int(max(0, min(self.player_stats["HP"], self.player_stats["MaxHP"])))   # CurrentHP es INT
+        delta = self.save_tracker.delta(SaveSnapshot(self.player_stats["Level"], hp_save, self.player_stats["MaxHP"], self.player_stats["XP"],
+                                                     self.player_x, self.player_y, float(self.max_unlocked_level), self.potions))
+        if delta is None: return
         self.saving_icon_timer = 60
-        conn = get_db_connection()
-        if conn:
-            try:
-                c = conn.cursor()
-                hp_save = max(0, min(self.player_stats["HP"], self.player_stats["MaxHP"]))
-                c.execute("""UPDATE SaveGames SET Level=?, CurrentHP=?, MaxHP=?, ExperiencePoints=?, PositionX=?, PositionY=?, PositionZ=?, LastSaved=GETDATE()
-                             FROM SaveGames s JOIN Players p ON s.PlayerID=p.PlayerID WHERE p.Username='Player1'""",
-                          (self.player_stats["Level"], hp_save, self.player_stats["MaxHP"], self.player_stats["XP"], self.player_x, self.player_y, float(self.max_unlocked_level)))
-                conn.commit(); conn.close()
-            except: pass
+        if self.journal: delta = delta._replace(seq=self.journal.append(delta.snap))
+        self.save_queue.submit(delta)
+
+    def write_save(self, delta):
+        # Se ejecuta en el hilo de SaveQueue
+        ok = self.player_session.save(delta.snap, delta.fields)
+        if ok and delta.seq and self.journal: self.journal.mark_synced(delta.seq)
+        return ok
+
+    def write_events(self, rows):
+        # Se ejecuta en el hilo de EventBuffer; sin jugador resuelto (BD caída) el lote se reintenta
+        pid = self.player_session.player_id
+        return pid is not None and self.storage.insert_events(pid, rows)
+
+    def log_event(self, kind, value=0, detail=None):
+        self.events.record(kind, self.current_stage, value, detail, self.sim_time_ms())
 
     def reset_progress(self):
         print("--- REINICIANDO PARTIDA ---")
-        conn = get_db_connection()
-        if conn:
-            try:
-                c = conn.cursor()
-                c.execute("""UPDATE SaveGames SET Level=1, CurrentHP=100, MaxHP=100, ExperiencePoints=0, PositionX=400, PositionY=300, PositionZ=1.0, LastSaved=GETDATE()
-                             FROM SaveGames s JOIN Players p ON s.PlayerID=p.PlayerID WHERE p.Username='Player1'""")
-                conn.commit(); conn.close()
-                self.player_stats = {"Username": "Hero", "Level": 1, "HP": 100, "MaxHP": 100, "Mana": 100, "MaxMana": 100, "XP": 0}
-                self.max_unlocked_level = 1
-                self.current_stage = 1
-                self.potions = 3
-                print("Reiniciado.")
-            except: pass
+        if self.recorder: self.recorder.reset()
+        # Pasa por la cola de guardado para no adelantarse a un guardado pendiente
+        self.player_stats = {"Username": self.display_name(), "Level": 1, "HP": 100, "MaxHP": 100, "Mana": 100, "MaxMana": 100, "XP": 0}
+        self.player_x, self.player_y = 400, 300
+        self.player_prev = (self.player_x, self.player_y)
+        self.max_unlocked_level = 1
+        self.current_stage = 1
+        self.potions = 3
+        self.save_game_to_db()
+        print("Reiniciado.")
+
+    def menu_start_level(self, stage):
+        """Arranque de fase elegido por el jugador (se graba; los avances de fase no)."""
+        if self.recorder: self.recorder.start(stage)
+        self.start_level(stage)
 
     def start_level(self, stage):
         if stage > 10: self.game_state = "victory"; self.save_game_to_db(); return
@@ -233,216 +311,315 @@ class GameEngine:
         config = self.levels_config[stage]
         self.target_kills = config["req"]
         self.kills_in_stage = 0
+        self.stage_started_ms = self.sim_time_ms()
         self.player_stats["HP"] = self.player_stats["MaxHP"]
         self.save_game_to_db()
         
-        self.projectiles = []; self.enemy_projectiles = []; self.particles = []; self.floating_texts = []; self.obstacles = []
+        self.projectiles = []; self.enemy_projectiles = []; self.particles.clear(); self.floating_texts = []; self.obstacles = []
+        self.grid.clear(); self.enemies.clear()
+        self.grid.insert("player", self.player_rect, "player")
         
         obs_key = config["obs"]
-        for _ in range(12):
-            while True:
-                ox, oy = random.randint(50, GAME_WIDTH-100), random.randint(100, GAME_HEIGHT-100)
-                rect = pygame.Rect(ox+10, oy+40, 30, 20)
-                if not rect.colliderect(pygame.Rect(350, 250, 150, 150)):
-                    self.obstacles.append({"rect": rect, "pos": (ox, oy), "img": obs_key}); break
+        if not self.headless: self.assets.enter_stage(self.stage_images(stage), self.stage_images(stage + 1))
+        self.layout = stage_layout(stage, self.seed, (GAME_WIDTH, GAME_HEIGHT))
+        for i, (pos, hit) in enumerate(self.layout.obstacles):
+            rect = pygame.Rect(hit)
+            self.obstacles.append({"rect": rect, "pos": pos, "img": obs_key})
+            self.grid.insert(("obs", i), rect, "obs")
+        self.nav.build([hit for _, hit in self.layout.obstacles])
         
         self.game_state = "playing"
-        self.spawn_enemy()
+        self.spawn_wave()
+
+    def spawn_wave(self):
+        # "wave" enemigos a la vez, sin pasarse de los que faltan para la meta
+        conf = self.levels_config[self.current_stage]
+        remaining = self.target_kills - self.kills_in_stage
+        for _ in range(min(conf.get("wave", 1), remaining) - len(self.enemies)): self.spawn_enemy()
 
     def spawn_enemy(self):
         conf = self.levels_config[self.current_stage]
         name = conf["enemy"]
-        tmpl = next((m for m in self.monster_catalog if m["Name"] == name), self.monster_catalog[0])
-        self.enemy_data = tmpl.copy()
-        
-        mult = 1 + (self.current_stage * 0.1)
-        self.enemy_data["MaxHP"] = int(self.enemy_data["MaxHP"] * mult * self.difficulty_mult)
-        self.enemy_data["HP"] = self.enemy_data["MaxHP"]
-        self.enemy_data["Attack"] = int(self.enemy_data["Attack"] * mult * self.difficulty_mult)
-
-        while True:
-            ex, ey = random.randint(50, GAME_WIDTH-100), random.randint(100, GAME_HEIGHT-100)
-            w, h = (150, 150) if name == "Ogre" else (50, 50)
-            self.enemy_rect = pygame.Rect(ex, ey, w, h)
-            if math.hypot(ex-self.player_x, ey-self.player_y) > 200: break
+        tmpl = self.catalog.spawn(self.current_stage, name)
+
+        w, h = (150, 150) if name == "Ogre" else (50, 50)
+        # Posiciones válidas ya calculadas con el mapa; solo se filtran las cercanas al jugador
+        ex, ey = pick_spawn(self.layout, (w, h), self.rng, (self.player_x, self.player_y))
+        slot = self.enemies.add(tmpl, ex, ey, w, h)
+        self.grid.insert(("enemy", slot), self.enemies.rects[slot], "enemy")
+        return slot
+
+    def add_projectile(self, lst, tag, rect, v):
+        p = {"rect": rect, "v": v}
+        lst.append(p)
+        self.grid.insert((tag, id(p)), rect, tag)
+
+    def drop_projectile(self, lst, tag, p):
+        if p in lst: lst.remove(p)
+        self.grid.remove((tag, id(p)))
+
+    # --- SIMULACIÓN (PASO FIJO) ---
+    def sim_time_ms(self):
+        """Tiempo de juego en ms: cuenta pasos de simulación, no tiempo real."""
+        return self.ticks * 1000 // TICK_RATE
+
+    def step(self, move=None, actions=()):
+        """
+        Un paso fijo de simulación. Con move=None se lee el teclado; sin
+        ventana el movimiento (dx, dy) y las acciones ("melee", "shoot",
+        "potion") llegan como argumentos.
+        """
+        self.apply_input(move, actions)
+        if self.game_state == "playing": self.update()
+        self.ticks += 1
+
+    def apply_input(self, move=None, actions=()):
+        """Primera mitad de step(): guarda las posiciones del paso anterior y aplica la entrada."""
+        self.player_prev = (self.player_x, self.player_y); self.enemies.snapshot()
+        if move is None: self.handle_input()
+        else: self.move_player(*move)
+        for action in actions:
+            if self.game_state != "playing": break
+            self.ACTIONS[action](self)
+
+    def sim_state(self):
+        """Estado del que parte la simulación (cabecera de las grabaciones)."""
+        return {"player": {k: self.player_stats[k] for k in ("Level", "HP", "MaxHP", "XP")},
+                "unlocked": self.max_unlocked_level, "potions": self.potions, "pos": [self.player_x, self.player_y],
+                "catalog": [[t["Name"], t["MaxHP"], t["Attack"], t["Speed"]] for t in self.catalog.templates]}
+
+    def apply_sim_state(self, state):
+        self.player_stats.update(state["player"])
+        self.max_unlocked_level = state["unlocked"]; self.potions = state["potions"]
+        self.player_x, self.player_y = state["pos"]; self.player_prev = (self.player_x, self.player_y)
+        self.player_rect.topleft = (self.player_x, self.player_y)
+        self.catalog.set_rows([tuple(r) for r in state["catalog"]])
+
+    def replay(self, log):
+        """
+        Re-ejecuta una sesión grabada (InputLog) sin reloj ni dibujo. El
+        motor debe crearse con seed=log.seed. Devuelve estadísticas.
+        """
+        self.apply_sim_state(log.initial)
+        ticks = 0
+        t0 = time.perf_counter()
+        for kind, *args in log:
+            if kind == "tick": self.step(*args); ticks += 1
+            elif kind == "start": self.start_level(args[0])
+            elif kind == "reset": self.reset_progress()
+        elapsed = time.perf_counter() - t0
+        return {"ticks": ticks, "elapsed_s": round(elapsed, 3), "ticks_per_s": round(ticks / elapsed) if elapsed else 0,
+                "stage": self.current_stage, "state": self.game_state, "level": self.player_stats["Level"],
+                "xp": self.player_stats["XP"], "hp": round(self.player_stats["HP"], 2), "pos": (self.player_x, self.player_y)}
+
+    def run_headless(self, ticks, stage=1, policy=chase_bot):
+        """
+        Simula `ticks` pasos sin reloj real ni dibujo. policy(game) decide
+        ((dx, dy), acciones) cada paso; al morir se repite la fase y al
+        ganar se vuelve a `stage`.
+        """
+        stats = {"ticks": 0, "deaths": 0, "victories": 0, "max_stage": stage}
+        self.menu_start_level(stage)
+        t0 = time.perf_counter()
+        for _ in range(ticks):
+            if self.game_state == "game_over": stats["deaths"] += 1; self.menu_start_level(self.current_stage)
+            elif self.game_state != "playing":
+                if self.game_state == "victory": stats["victories"] += 1
+                self.menu_start_level(stage)
+            move, actions = policy(self) if policy else ((0, 0), ())
+            if self.recorder: self.recorder.tick(move, actions)
+            self.step(move, actions)
+            stats["max_stage"] = max(stats["max_stage"], self.current_stage)
+        elapsed = time.perf_counter() - t0
+        stats.update(ticks=ticks, elapsed_s=round(elapsed, 3), ticks_per_s=round(ticks / elapsed) if elapsed else 0)
+        return stats
 
     def update(self):
+        if self.slash_timer > 0: self.slash_timer -= 1
         if self.player_stats["Mana"] < 100: self.player_stats["Mana"] += 0.2
         if self.player_stats["HP"] < self.player_stats["MaxHP"]: self.player_stats["HP"] += 0.02
 
+        # Las colisiones se resuelven contra la rejilla espacial; los obstáculos frenan los proyectiles
         for p in self.projectiles[:]:
             p["rect"].x += p["v"][0]; p["rect"].y += p["v"][1]
             if not (0 < p["rect"].x < GAME_WIDTH and 0 < p["rect"].y < GAME_HEIGHT):
-                if p in self.projectiles: self.projectiles.remove(p)
+                self.drop_projectile(self.projectiles, "proj", p)
                 continue
-            if p["rect"].colliderect(self.enemy_rect):
-                self.damage_enemy_ranged(25 + self.player_stats["Level"] * 2)
-                if p in self.projectiles: self.projectiles.remove(p)
-                break
-
-        ename = self.enemy_data["Name"]
-        speed = self.enemy_data.get("Speed", 2)
-        ex, ey = self.enemy_rect.x, self.enemy_rect.y
-        dist = math.hypot(self.player_x - ex, self.player_y - ey)
-
-        if ename == "Brain": 
-            if dist < 200: 
-                if self.player_x > ex: ex -= speed
-                else: ex += speed
-                if self.player_y > ey: ey -= speed
-                else: ey += speed
-            else:
-                if self.player_x > ex: ex += speed
-                else: ex -= speed
-            self.enemy_action_timer += 1
-            if self.enemy_action_timer > 90:
-                self.enemy_action_timer = 0
-                dx, dy = self.player_x - ex, self.player_y - ey
-                mag = math.sqrt(dx**2 + dy**2)
-                if mag != 0: self.enemy_projectiles.append({"rect": pygame.Rect(ex+20, ey+20, 20, 20), "v": (dx/mag*7, dy/mag*7)})
-
-        elif ename == "Shadow":
-            if self.player_x > ex: ex += speed*1.2
-            else: ex -= speed*1.2
-            if self.player_y > ey: ey += speed*1.2
-            else: ey -= speed*1.2
-            self.enemy_action_timer += 1
-            if self.enemy_action_timer > 120 and dist < 150:
-                self.enemy_action_timer = 0
-                ex = max(50, min(self.player_x + random.choice([-80, 80]), GAME_WIDTH-50))
-                ey = max(100, min(self.player_y + random.choice([-80, 80]), GAME_HEIGHT-50))
-                for _ in range(5): self.particles.append(Particle(ex, ey, BLACK))
-        else: 
-            if ename=="Ogre": speed=1.0
-            if self.player_x > ex: ex += speed
-            else: ex -= speed
-            if self.player_y > ey: ey += speed
-            else: ey -= speed
-
-        ex = max(0, min(ex, GAME_WIDTH - self.enemy_rect.width))
-        ey = max(100, min(ey, GAME_HEIGHT - self.enemy_rect.height))
-        self.enemy_rect.x, self.enemy_rect.y = ex, ey
-
-        if self.player_rect.colliderect(self.enemy_rect): self.take_damage(self.enemy_data["Attack"])
+            self.grid.update(("proj", id(p)))
+            hits = self.grid.query_rect(p["rect"], tags=("enemy", "obs"))
+            if not hits: continue
+            self.drop_projectile(self.projectiles, "proj", p)
+            target = min((k for k in hits if k[0] == "enemy"), default=None)   # orden estable (repetible)
+            if target:
+                stage = self.current_stage
+                self.damage_enemy_ranged(target[1], 25 + self.player_stats["Level"] * 2)
+                if stage != self.current_stage or self.game_state != "playing": break
+
+        # IA de todos los enemigos en bloque (ver EnemyTable.update)
+        self.nav.update(self.player_x + 20, self.player_y + 20)     # solo recalcula si el jugador cambió de celda
+        shots, teleports = self.enemies.update(self.player_x, self.player_y, self.nav)
+        for x, y, vx, vy in shots: self.add_projectile(self.enemy_projectiles, "eproj", pygame.Rect(x, y, 20, 20), (vx, vy))
+        for x, y in teleports: self.particles.emit(x, y, BLACK, 5)
+        for slot in self.enemies.slots(): self.grid.update(("enemy", slot))
+
+        contact = self.grid.query_rect(self.player_rect, tags=("enemy",))
+        if contact: self.take_damage(max(int(self.enemies.attack[k[1]]) for k in contact))
 
         for p in self.enemy_projectiles[:]:
             p["rect"].x += p["v"][0]; p["rect"].y += p["v"][1]
             if not (0 < p["rect"].x < GAME_WIDTH and 0 < p["rect"].y < GAME_HEIGHT):
-                if p in self.enemy_projectiles: self.enemy_projectiles.remove(p)
+                self.drop_projectile(self.enemy_projectiles, "eproj", p)
                 continue
-            if p["rect"].colliderect(self.player_rect):
+            self.grid.update(("eproj", id(p)))
+            hits = self.grid.query_rect(p["rect"], tags=("player", "obs"))
+            if "player" in hits:
                 self.take_damage(15); 
-                if p in self.enemy_projectiles: self.enemy_projectiles.remove(p)
+                self.drop_projectile(self.enemy_projectiles, "eproj", p)
+            elif hits: self.drop_projectile(self.enemy_projectiles, "eproj", p)
 
         for t in self.floating_texts[:]:
             t.update(); 
             if t.timer <= 0: self.floating_texts.remove(t)
-        for part in self.particles[:]:
-            part.update(); 
-            if part.life <= 0: self.particles.remove(part)
+        self.particles.update()
 
     def take_damage(self, dmg):
-        now = pygame.time.get_ticks()
+        now = self.sim_time_ms()
         if now - self.last_damage_time > 1000:
             self.player_stats["HP"] -= dmg
             self.last_damage_time = now
+            self.log_event("hurt", dmg)
             self.floating_texts.append(FloatingText(self.player_x, self.player_y, f"-{dmg}", RED, self.font_m))
             if self.player_stats["HP"] <= 0: self.game_state = "game_over"; self.save_game_to_db()
 
-    def damage_enemy(self, dmg):
-        self.enemy_data["HP"] -= dmg
-        self.floating_texts.append(FloatingText(self.enemy_rect.centerx, self.enemy_rect.y, str(dmg), WHITE, self.font_m))
-        if "hit" in self.sounds and self.sounds["hit"]: self.sounds["hit"].play()
-        
-        if self.enemy_data["HP"] <= 0:
-            xp = 20 * self.current_stage; self.player_stats["XP"] += xp
-            self.floating_texts.append(FloatingText(self.player_x, self.player_y, f"+{xp} XP", GOLD, self.font_m))
-            if self.player_stats["XP"] >= self.player_stats["Level"]*100:
-                self.player_stats["Level"] += 1; self.player_stats["XP"] = 0
-                self.player_stats["MaxHP"] += 20; self.player_stats["HP"] = self.player_stats["MaxHP"]
-                self.floating_texts.append(FloatingText(self.player_x, self.player_y-40, "LEVEL UP!", GREEN, self.font_l))
-                self.save_game_to_db()
-            for _ in range(8): self.particles.append(Particle(self.enemy_rect.centerx, self.enemy_rect.centery, RED))
-            self.kills_in_stage += 1
-            if self.kills_in_stage >= self.target_kills: self.start_level(self.current_stage + 1)
-            else: self.spawn_enemy()
+    def damage_enemy(self, slot, dmg):
+        en = self.enemies
+        en.hp[slot] -= dmg
+        r = en.rects[slot]
+        self.log_event("damage", dmg, en.names[slot])
+        self.floating_texts.append(FloatingText(r.centerx, r.y, str(dmg), WHITE, self.font_m))
+        self.audio.play("hit")
+        if en.hp[slot] <= 0: self.handle_kill(slot)
 
     # --- DISPARO & MELEE (RESTITUIDOS) ---
     def shoot(self):
         if self.player_stats["Mana"] >= 10:
             self.player_stats["Mana"] -= 10
             vx, vy = self.last_dir
-            self.projectiles.append({"rect": pygame.Rect(self.player_x+20, self.player_y+20, 20, 20), "v": (vx*12, vy*12)})
-            if "magic" in self.sounds and self.sounds["magic"]: self.sounds["magic"].play()
+            self.add_projectile(self.projectiles, "proj", pygame.Rect(self.player_x+20, self.player_y+20, 20, 20), (vx*12, vy*12))
+            self.audio.play("magic")
         else:
             self.floating_texts.append(FloatingText(self.player_x, self.player_y-30, "NO MANA", BLUE, self.font_s))
 
-    def damage_enemy_ranged(self, dmg):
-        self.enemy_data["HP"] -= dmg
-        self.floating_texts.append(FloatingText(self.enemy_rect.centerx, self.enemy_rect.y, str(dmg), WHITE, self.font_m))
-        if self.enemy_data["HP"] <= 0: self.handle_kill()
+    def damage_enemy_ranged(self, slot, dmg):
+        en = self.enemies
+        en.hp[slot] -= dmg
+        r = en.rects[slot]
+        self.log_event("damage", dmg, en.names[slot])
+        self.floating_texts.append(FloatingText(r.centerx, r.y, str(dmg), WHITE, self.font_m))
+        if en.hp[slot] <= 0: self.handle_kill(slot)
 
-    def handle_kill(self):
-        # Misma logica que damage_enemy
+    def handle_kill(self, slot):
         xp = 20 * self.current_stage; self.player_stats["XP"] += xp
+        self.log_event("kill", xp, self.enemies.names[slot])
         self.floating_texts.append(FloatingText(self.player_x, self.player_y, f"+{xp} XP", GOLD, self.font_m))
         if self.player_stats["XP"] >= self.player_stats["Level"]*100:
             self.player_stats["Level"] += 1; self.player_stats["XP"] = 0
             self.player_stats["MaxHP"] += 20; self.player_stats["HP"] = self.player_stats["MaxHP"]
+            self.log_event("level_up", self.player_stats["Level"])
             self.floating_texts.append(FloatingText(self.player_x, self.player_y-40, "LEVEL UP!", GREEN, self.font_l))
             self.save_game_to_db()
-        for _ in range(8): self.particles.append(Particle(self.enemy_rect.centerx, self.enemy_rect.centery, RED))
+        r = self.enemies.rects[slot]
+        self.particles.emit(r.centerx, r.centery, RED, 8)
+        self.enemies.kill(slot); self.grid.remove(("enemy", slot))
         self.kills_in_stage += 1
-        if self.kills_in_stage >= self.target_kills: self.start_level(self.current_stage + 1)
-        else: self.spawn_enemy()
+        if self.kills_in_stage >= self.target_kills:
+            self.log_event("stage_clear", self.sim_time_ms() - self.stage_started_ms)
+            self.start_level(self.current_stage + 1)
+        else: self.spawn_wave()
 
     def attack_melee(self):
         self.slash_timer = 15
         atk_rect = self.player_rect.inflate(70, 70)
-        if atk_rect.colliderect(self.enemy_rect):
-            dmg = 20 + (self.player_stats["Level"] * 4)
-            self.damage_enemy(dmg)
+        dmg = 20 + (self.player_stats["Level"] * 4)
+        stage = self.current_stage
+        for _, slot in sorted(self.grid.query_rect(atk_rect, tags=("enemy",))):
+            if stage != self.current_stage or self.game_state != "playing": break
+            if self.enemies.alive[slot]: self.damage_enemy(slot, dmg)
 
     def use_potion(self):
         if self.potions > 0 and self.player_stats["HP"] < self.player_stats["MaxHP"]:
             self.potions -= 1
             heal = int(self.player_stats["MaxHP"] * 0.5)
             self.player_stats["HP"] = min(self.player_stats["MaxHP"], self.player_stats["HP"] + heal)
+            self.log_event("potion", heal)
             self.floating_texts.append(FloatingText(self.player_x, self.player_y, f"+{heal}", GREEN, self.font_m))
-            if "drink" in self.sounds and self.sounds["drink"]: self.sounds["drink"].play()
+            self.audio.play("drink")
 
-    def handle_input(self):
+    ACTIONS = {"melee": attack_melee, "shoot": shoot, "potion": use_potion}
+
+    def read_move(self):
         keys = pygame.key.get_pressed()
         dx, dy = 0, 0
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]: dx = -1; self.facing_right = False
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]: dx = 1; self.facing_right = True
+        if keys[pygame.K_LEFT] or keys[pygame.K_a]: dx = -1
+        if keys[pygame.K_RIGHT] or keys[pygame.K_d]: dx = 1
         if keys[pygame.K_UP] or keys[pygame.K_w]: dy = -1
         if keys[pygame.K_DOWN] or keys[pygame.K_s]: dy = 1
-        if dx!=0 or dy!=0: self.last_dir = (dx, dy)
-        
-        self.player_x = max(0, min(self.player_x + dx*self.player_speed, GAME_WIDTH-40))
-        self.player_y = max(100, min(self.player_y + dy*self.player_speed, GAME_HEIGHT-40))
-        self.player_rect.topleft = (self.player_x, self.player_y)
-        
+        return dx, dy
+
+    def handle_input(self):
+        self.move_player(*self.read_move())
+
+    # --- EVENTOS (UN SOLO BOMBEO POR FRAME) ---
+    GAME_KEYS = {pygame.K_SPACE: "melee", pygame.K_z: "shoot", pygame.K_h: "potion"}
+
+    def pump_events(self):
+        """
+        Único consumidor de la cola de pygame. Las teclas de juego no actúan
+        aquí: se convierten en acciones pendientes que toma el siguiente paso
+        de simulación (next_command), junto con el movimiento leído una vez.
+        """
         for event in pygame.event.get():
             if event.type == pygame.QUIT: self.save_game_to_db(); self.running = False
+            if event.type == pygame.VIDEORESIZE: self.presenter.resize()
+            if event.type == pygame.WINDOWEXPOSED: self.presenter.invalidate()
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE: self.game_state = "paused"
-                if event.key == pygame.K_SPACE: self.attack_melee()
-                if event.key == pygame.K_z: self.shoot()
-                if event.key == pygame.K_h: self.use_potion()
+                if event.key == pygame.K_F3: self.profiler.toggle_overlay()
+                if self.game_state == "playing":
+                    if event.key == pygame.K_ESCAPE: self.game_state = "paused"; self.pending_actions.clear()
+                    elif event.key in self.GAME_KEYS: self.pending_actions.append(self.GAME_KEYS[event.key])
+                elif self.game_state == "paused":
+                    if event.key == pygame.K_ESCAPE: self.game_state = "playing"
+                    if event.key == pygame.K_q: self.save_game_to_db(); self.game_state = "title"
+        self.frame_move = self.read_move() if self.game_state == "playing" else (0, 0)
+
+    def next_command(self):
+        """Comando del siguiente paso: (movimiento, acciones). Si se graba, queda en el registro."""
+        move, actions = self.frame_move, tuple(self.pending_actions)
+        self.pending_actions.clear()
+        if self.recorder: self.recorder.tick(move, actions)
+        return move, actions
+
+    def move_player(self, dx, dy):
+        if dx < 0: self.facing_right = False
+        elif dx > 0: self.facing_right = True
+        if dx!=0 or dy!=0: self.last_dir = (dx, dy)
+        
+        nx = max(0, min(self.player_x + dx*self.player_speed, GAME_WIDTH-40))
+        ny = max(100, min(self.player_y + dy*self.player_speed, GAME_HEIGHT-40))
+        # Los pies del jugador no atraviesan la base de los obstáculos (eje a eje, para deslizar)
+        if not self.feet_blocked(self.player_x, self.player_y):
+            if self.feet_blocked(nx, self.player_y): nx = self.player_x
+            if self.feet_blocked(nx, ny): ny = self.player_y
+        self.player_x, self.player_y = nx, ny
+        self.player_rect.topleft = (self.player_x, self.player_y)
+        self.grid.update("player")
+
+    def feet_blocked(self, x, y):
+        return bool(self.grid.query_rect(pygame.Rect(x+5, y+28, 30, 12), tags=("obs",)))
 
     # --- DIBUJO ---
     def get_game_pos(self, mouse_pos):
-        win_w, win_h = self.screen.get_size()
-        scale_x = win_w / GAME_WIDTH
-        scale_y = win_h / GAME_HEIGHT
-        scale = min(scale_x, scale_y)
-        new_w = int(GAME_WIDTH * scale); new_h = int(GAME_HEIGHT * scale)
-        offset_x = (win_w - new_w) // 2; offset_y = (win_h - new_h) // 2
-        mx = (mouse_pos[0] - offset_x) / scale
-        my = (mouse_pos[1] - offset_y) / scale
-        return (mx, my)
+        return self.presenter.to_game(mouse_pos)
 
     def draw_panel(self, x, y, w, h):
         pygame.draw.rect(self.canvas, DARK_BLUE, (x, y, w, h))
@@ -454,33 +631,31 @@ class GameEngine:
         pct = max(0, min(current / max_val, 1))
         pygame.draw.rect(self.canvas, color, (x, y, bar_w * pct, bar_h))
         pygame.draw.rect(self.canvas, WHITE, (x, y, bar_w, bar_h), 2)
-        lbl = self.font_s.render(f"{label}: {int(current)}/{max_val}", True, WHITE)
+        lbl = self.text_cache.render(self.font_s, f"{label}: {int(current)}/{max_val}", WHITE)
         self.canvas.blit(lbl, (x + 5, y + 2))
 
     def draw_ui(self):
-        if self.images["bg_forest.png"]: self.canvas.blit(self.images["bg_forest.png"], (0,0))
-        s = pygame.Surface((GAME_WIDTH, GAME_HEIGHT), pygame.SRCALPHA); s.fill(DARK_OVERLAY); self.canvas.blit(s,(0,0))
+        self.canvas.blit(self.renderer.menu_background(self.images.get("bg_forest.png")), (0,0))
         
         real_mouse = pygame.mouse.get_pos()
         m = self.get_game_pos(real_mouse)
         click = pygame.mouse.get_pressed()[0]
 
         if self.game_state == "title":
-            t = self.font_l.render("RETRO RPG", True, GOLD)
-            shadow = self.font_l.render("RETRO RPG", True, BLACK)
-            self.canvas.blit(shadow, (GAME_WIDTH//2-t.get_width()//2+4, 104))
-            self.canvas.blit(t, (GAME_WIDTH//2-t.get_width()//2, 100))
+            t = self.text_cache.render_shadowed(self.font_l, "RETRO RPG", GOLD, BLACK, 4)
+            self.canvas.blit(t, (GAME_WIDTH//2-(t.get_width()-4)//2, 100))
             
             bx, by, bw, bh = 300, 280, 200, 60
             self.draw_panel(bx, by, bw, bh)
-            btn_txt = self.font_m.render("JUGAR", True, WHITE)
-            if pygame.Rect(bx, by, bw, bh).collidepoint(m): 
+            ready = self.startup.done(*self.play_gate)   # sin partida ni catálogo aún no se puede jugar
+            btn_txt = self.text_cache.render(self.font_m, "JUGAR" if ready else "CARGANDO", WHITE if ready else GRAY)
+            if ready and pygame.Rect(bx, by, bw, bh).collidepoint(m): 
                 pygame.draw.rect(self.canvas, WHITE, (bx, by, bw, bh), 3)
                 if click: self.game_state = "level_select"; pygame.time.delay(200)
             self.canvas.blit(btn_txt, (bx + (bw-btn_txt.get_width())//2, by + 20))
 
         elif self.game_state == "level_select":
-            t = self.font_l.render("MAPAS", True, WHITE)
+            t = self.text_cache.render(self.font_l, "MAPAS", WHITE)
             self.canvas.blit(t, (GAME_WIDTH//2 - t.get_width()//2, 30))
             for i in range(1, 11):
                 col = 0 if i <= 5 else 1; row = (i-1) % 5
@@ -490,16 +665,16 @@ class GameEngine:
                 
                 self.draw_panel(x, y, 300, 60)
                 color_txt = GREEN if unlk else RED
-                txt = self.font_s.render(nm if unlk else "BLOQUEADO", True, color_txt)
+                txt = self.text_cache.render(self.font_s, nm if unlk else "BLOQUEADO", color_txt)
                 self.canvas.blit(txt, (x + 20, y + 25))
                 if unlk and pygame.Rect(x,y,300,60).collidepoint(m) and click:
-                    self.start_level(i); pygame.time.delay(200)
+                    self.menu_start_level(i); pygame.time.delay(200)
 
             # Botón RESET
             rx, ry, rw, rh = 300, 520, 200, 60
             self.draw_panel(rx, ry, rw, rh)
             pygame.draw.rect(self.canvas, RED, (rx, ry, rw, rh), 1)
-            rtxt = self.font_m.render("RESET", True, RED)
+            rtxt = self.text_cache.render(self.font_m, "RESET", RED)
             if pygame.Rect(rx, ry, rw, rh).collidepoint(m):
                 pygame.draw.rect(self.canvas, RED, (rx, ry, rw, rh), 3)
                 if click: self.reset_progress(); pygame.time.delay(500)
@@ -508,78 +683,97 @@ class GameEngine:
 
         elif self.game_state == "paused":
             self.draw_panel(200, 200, 400, 200)
-            t = self.font_l.render("PAUSA", True, WHITE)
+            t = self.text_cache.render(self.font_l, "PAUSA", WHITE)
             self.canvas.blit(t, (GAME_WIDTH//2 - t.get_width()//2, 220))
-            msg = self.font_s.render("ESC: Volver | Q: Menu", True, YELLOW)
+            msg = self.text_cache.render(self.font_s, "ESC: Volver | Q: Menu", YELLOW)
             self.canvas.blit(msg, (GAME_WIDTH//2 - msg.get_width()//2, 300))
 
-    def draw_game(self):
+    def draw_game(self, alpha=1.0):
+        # alpha: fracción del paso siguiente ya transcurrida; las posiciones se interpolan entre pasos
         conf = self.levels_config[self.current_stage]
-        if self.images[conf["bg"]]: self.canvas.blit(self.images[conf["bg"]], (0,0))
-        
-        draw_list = []
-        for o in self.obstacles: draw_list.append({"y": o["pos"][1]+50, "type": "obs", "obj": o})
-        draw_list.append({"y": self.player_y+50, "type": "player"})
-        draw_list.append({"y": self.enemy_rect.y+50, "type": "enemy"})
-        draw_list.sort(key=lambda x: x["y"])
+        # Fondo + obstáculos pre-compuestos; solo se ordenan los sprites dinámicos
+        self.renderer.prepare_stage((self.layout.stage, self.layout.seed), self.images[conf["bg"]], self.obstacles, self.images)
+        self.canvas.blit(self.renderer.static, (0,0))
+
+        en = self.enemies
+        slots = en.slots()
+        if alpha >= 1.0:
+            px, py = self.player_x, self.player_y
+            enemy_rects = [en.rects[slot] for slot in slots]
+        else:
+            (ox, oy), px, py = self.player_prev, self.player_x, self.player_y
+            px = int(ox + (px - ox) * alpha); py = int(oy + (py - oy) * alpha)
+            enemy_rects = [en.rects[slot].copy() for slot in slots]
+            for slot, r in zip(slots, enemy_rects): r.topleft = en.draw_pos(slot, alpha)
+        player_area = pygame.Rect(px-15, py-15, 80, 80)
+        # Lo que se pinta de cada enemigo: su imagen (el Ogro es mayor que su rect) y la barra de vida encima
+        enemy_areas = []
+        for slot, r in zip(slots, enemy_rects):
+            img = self.images.get(ENEMY_IMAGES.get(en.names[slot], ""))
+            area = img.get_rect(topleft=r.topleft) if img else r.copy()
+            enemy_areas.append(area.union((r.x, r.y-10, 50, 5)))
+        draw_list = [(py+50, 1, 0, "player", None)]
+        for slot, r in zip(slots, enemy_rects): draw_list.append((r.y+50, 2, slot, "enemy", (slot, r)))
+        for i, (depth, rect, img) in self.renderer.occluders_over([player_area] + enemy_areas): draw_list.append((depth, 0, i, "obs", (img, rect)))
+        draw_list.sort(key=lambda x: x[:3])
         
-        for item in draw_list:
-            if item["type"] == "obs":
-                o = item["obj"]
-                if self.images[o["img"]]: self.canvas.blit(self.images[o["img"]], o["pos"])
-            elif item["type"] == "player":
+        for _, _, _, kind, obj in draw_list:
+            if kind == "obs":
+                self.canvas.blit(obj[0], obj[1])
+            elif kind == "player":
                 img = self.images["player.png"] 
-                if not self.facing_right: img = pygame.transform.flip(img, True, False)
-                self.canvas.blit(img, (self.player_x, self.player_y))
+                if img:
+                    if not self.facing_right: img = pygame.transform.flip(img, True, False)
+                    self.canvas.blit(img, (px, py))
+                else: pygame.draw.rect(self.canvas, BLUE, (px, py, 40, 40))
                 if self.slash_timer > 0:
                     sl = self.images["slash.png"] 
-                    if sl: self.canvas.blit(sl, (self.player_x-15, self.player_y-15))
-            elif item["type"] == "enemy":
-                img_name = conf["enemy"]
-                filename = ""
-                if img_name == "Goblin": filename = "goblin.png"
-                elif img_name == "Shadow": filename = "shadow.png"
-                elif img_name == "Brain": filename = "brain.png"
-                elif img_name == "Ogre": filename = "ogre.png"
-                
-                img = self.images.get(filename) 
-                if img: self.canvas.blit(img, self.enemy_rect.topleft)
-                else: pygame.draw.rect(self.canvas, RED, self.enemy_rect)
-                pct = max(0, self.enemy_data["HP"] / self.enemy_data["MaxHP"])
-                pygame.draw.rect(self.canvas, RED, (self.enemy_rect.x, self.enemy_rect.y-10, 50*pct, 5))
-
+                    if sl: self.canvas.blit(sl, (px-15, py-15))
+            else:
+                slot, r = obj
+                img = self.images.get(ENEMY_IMAGES.get(en.names[slot], ""))
+                if img: self.canvas.blit(img, r.topleft)
+                else: pygame.draw.rect(self.canvas, RED, r)
+                pct = max(0, en.hp[slot] / en.max_hp[slot])
+                pygame.draw.rect(self.canvas, RED, (r.x, r.y-10, 50*pct, 5))
+
+        back = 1.0 - alpha
         for p in self.projectiles:
-            if self.images["fireball.png"]: self.canvas.blit(self.images["fireball.png"], p["rect"]) 
-            else: pygame.draw.circle(self.canvas, ORANGE, p["rect"].center, 6)
+            r = p["rect"].move(-p["v"][0]*back, -p["v"][1]*back) if back else p["rect"]
+            if self.images["fireball.png"]: self.canvas.blit(self.images["fireball.png"], r) 
+            else: pygame.draw.circle(self.canvas, ORANGE, r.center, 6)
         for ep in self.enemy_projectiles:
-            pygame.draw.circle(self.canvas, PURPLE, ep["rect"].center, 8) 
+            r = ep["rect"].move(-ep["v"][0]*back, -ep["v"][1]*back) if back else ep["rect"]
+            pygame.draw.circle(self.canvas, PURPLE, r.center, 8) 
             
         for t in self.floating_texts: t.draw(self.canvas)
-        for p in self.particles: p.draw(self.canvas)
+        self.particles.draw(self.canvas)
 
         self.draw_panel(0, 0, GAME_WIDTH, 80)
         info = f"{self.player_stats['Username']} | LVL {self.player_stats['Level']}"
-        self.canvas.blit(self.font_m.render(info, True, GOLD), (20, 15))
+        self.canvas.blit(self.text_cache.render(self.font_m, info, GOLD), (20, 15))
         self.draw_bar_pro(20, 45, self.player_stats["HP"], self.player_stats["MaxHP"], RED, "HP")
         self.draw_bar_pro(240, 45, self.player_stats["Mana"], 100, BLUE, "MP")
-        self.canvas.blit(self.font_s.render(f"Pociones: {self.potions} [H]", True, GREEN), (460, 20))
+        self.canvas.blit(self.text_cache.render(self.font_s, f"Pociones: {self.potions} [H]", GREEN), (460, 20))
         goal = f"Meta: {self.target_kills - self.kills_in_stage}"
         if self.current_stage==10: goal = "BOSS FINAL"
-        self.canvas.blit(self.font_m.render(goal, True, RED), (460, 50))
+        self.canvas.blit(self.text_cache.render(self.font_m, goal, RED), (460, 50))
 
+        # Amarillo mientras se guarda, verde al confirmar, rojo si falló
+        if self.save_queue.busy: self.saving_icon_timer = 60
         if self.saving_icon_timer > 0:
             self.saving_icon_timer -= 1
-            pygame.draw.circle(self.canvas, YELLOW, (GAME_WIDTH-30, GAME_HEIGHT-30), 8)
+            icon_col = YELLOW if self.save_queue.busy else (RED if self.save_queue.last_error else GREEN)
+            pygame.draw.circle(self.canvas, icon_col, (GAME_WIDTH-30, GAME_HEIGHT-30), 8)
 
     def draw_victory_screen(self):
-        s = pygame.Surface((GAME_WIDTH, GAME_HEIGHT), pygame.SRCALPHA); s.fill(DARK_OVERLAY)
-        self.canvas.blit(s, (0,0))
+        self.canvas.blit(self.renderer.overlay, (0,0))
         
-        t = self.font_xl.render("¡VICTORIA!", True, GOLD)
+        t = self.text_cache.render(self.font_xl, "¡VICTORIA!", GOLD)
         t_rect = t.get_rect(center=(GAME_WIDTH//2, GAME_HEIGHT//3))
         self.canvas.blit(t, t_rect)
         
-        sub = self.font_m.render("Has salvado el reino.", True, WHITE)
+        sub = self.text_cache.render(self.font_m, "Has salvado el reino.", WHITE)
         sub_rect = sub.get_rect(center=(GAME_WIDTH//2, GAME_HEIGHT//2))
         self.canvas.blit(sub, sub_rect)
 
@@ -594,52 +788,113 @@ class GameEngine:
             pygame.draw.rect(self.canvas, WHITE, (bx, by, bw, bh), 3)
             if click: self.game_state = "title"; pygame.time.delay(200)
             
-        btn_txt = self.font_m.render("MENU", True, WHITE)
+        btn_txt = self.text_cache.render(self.font_m, "MENU", WHITE)
         self.canvas.blit(btn_txt, (bx + (bw-btn_txt.get_width())//2, by + 20))
 
+    def draw_screen(self, alpha=1.0):
+        """Dibuja en el canvas la pantalla del estado actual."""
+        if self.game_state == "playing": self.draw_game(alpha)
+        elif self.game_state == "title": self.draw_ui()
+        elif self.game_state == "level_select": self.draw_ui()
+        elif self.game_state == "paused": self.draw_ui()
+        elif self.game_state == "game_over":
+            self.canvas.fill(BLACK)
+            t = self.text_cache.render(self.font_l, "GAME OVER", RED)
+            self.canvas.blit(t, (GAME_WIDTH//2-t.get_width()//2, 250))
+            self.draw_victory_screen() 
+        elif self.game_state == "victory":
+            self.draw_game()
+            self.draw_victory_screen()
+
     def draw_window(self):
-        win_w, win_h = self.screen.get_size()
-        scale_x = win_w / GAME_WIDTH
-        scale_y = win_h / GAME_HEIGHT
-        scale = min(scale_x, scale_y)
-        new_w = int(GAME_WIDTH * scale); new_h = int(GAME_HEIGHT * scale)
-        offset_x = (win_w - new_w) // 2; offset_y = (win_h - new_h) // 2
-        scaled_surf = pygame.transform.scale(self.canvas, (new_w, new_h))
-        self.screen.fill(BLACK) 
-        self.screen.blit(scaled_surf, (offset_x, offset_y))
-        pygame.display.flip()
+        self.presenter.present()
 
     def run(self):
         while self.running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT: self.save_game_to_db(); self.running = False
-                if event.type == pygame.KEYDOWN:
-                    if self.game_state == "playing":
-                        if event.key == pygame.K_ESCAPE: self.game_state = "paused"
-                        if event.key == pygame.K_SPACE: self.attack_melee()
-                        if event.key == pygame.K_z: self.shoot()
-                        if event.key == pygame.K_h: self.use_potion()
-                    elif self.game_state == "paused":
-                        if event.key == pygame.K_ESCAPE: self.game_state = "playing"
-                        if event.key == pygame.K_q: self.save_game_to_db(); self.game_state = "title"
-
-            if self.game_state == "playing": self.handle_input(); self.update(); self.draw_game()
-            elif self.game_state == "title": self.draw_ui()
-            elif self.game_state == "level_select": self.draw_ui()
-            elif self.game_state == "paused": self.draw_ui()
-            elif self.game_state == "game_over":
-                self.canvas.fill(BLACK)
-                t = self.font_l.render("GAME OVER", True, RED)
-                self.canvas.blit(t, (GAME_WIDTH//2-t.get_width()//2, 250))
-                self.draw_victory_screen() 
-            elif self.game_state == "victory":
-                self.draw_game()
-                self.draw_victory_screen()
-
+            prof = self.profiler.active
+            self.startup.poll()
+            self.audio.poll()
+            self.poll_assets()
+            self.pump_events()
+            if prof: prof.mark("events")
+
+            # La simulación avanza a pasos fijos (TICK_RATE) según el reloj; el dibujo interpola entre pasos
+            ticks = 0
+            if self.game_state != "playing": self.stepper.reset()
+            if self.game_state == "playing":
+                for _ in range(self.stepper.ticks()):
+                    self.step(*self.next_command()); ticks += 1
+                    if self.game_state != "playing": break
+            if prof: prof.mark("update")
+            self.draw_screen(self.stepper.alpha if self.game_state == "playing" else 1.0)
+            if self.profiler.overlay: self.profiler.draw(self.canvas, self.font_s)
+            if prof: prof.mark("draw")
             self.draw_window()
+            if not self.startup.reported: self.track_startup()
+            if prof: prof.mark("present")
             self.clock.tick(FPS)
+            if prof:
+                prof.mark("idle")
+                prof.end_frame(ticks, len(self.enemies), len(self.particles),
+                               len(self.projectiles) + len(self.enemy_projectiles), len(self.floating_texts))
+        self.close()
         pygame.quit(); sys.exit()
 
+    def track_startup(self):
+        # Tiempo hasta el primer frame y hasta poder pulsar JUGAR; el informe sale cuando ha terminado todo
+        st = self.startup
+        st.mark("first_frame")
+        if not self.audio.music_started: self.audio.start_music()   # tras el primer frame del título
+        if st.done(*self.play_gate): st.mark("interactive")
+        if st.done() and "interactive" in st.marks: st.report()
+
+    def close(self):
+        if not self.startup.wait(timeout=2.0): print("Aviso: arranque sin terminar al salir.")
+        if self.recorder: self.recorder.close(); print(f"Grabación: {self.recorder.ticks} pasos en {self.recorder.path}")
+        if self.profiler.frames: self.profiler.disable(); self.profiler.report()
+        if not self.save_queue.stop(timeout=3.0): print("Aviso: guardado pendiente sin confirmar al salir.")
+        st = self.save_tracker.stats
+        print(f"Guardados: {st['issued']} escritos ({st['full']} completos, {st['columns']} columnas en los parciales), "
+              f"{st['skipped']} omitidos ({st['throttled']} solo por posición), {self.save_queue.stats['coalesced']} fusionados en cola")
+        if not self.events.stop(timeout=1.0): print("Aviso: eventos de juego sin guardar al salir.")
+        es = self.events.stats
+        print(f"Eventos: {es['written']} de {es['recorded']} guardados en {es['batches']} lotes, "
+              f"{es['dropped']} descartados, {es['rejected']} de tipo desconocido, {es['failed_batches']} lotes fallidos, cola máx. {es['max_queued']}")
+        ns = self.nav.stats
+        if ns["recomputes"]:
+            print(f"Navegación: {ns['recomputes']} recálculos del campo de flujo, {ns['total_ms'] / ns['recomputes']:.3f} ms de media "
+                  f"(máx. {ns['max_ms']:.3f}), {ns['total_ms'] / max(1, self.ticks):.3f} ms por paso")
+        if self.journal:
+            self.journal.close()
+            js = self.journal.stats
+            print(f"Diario: {js['appended']} guardados, {js['fsyncs']} fsync, {js['compactions']} compactaciones, "
+                  f"{js['replays']} reenvíos{' (queda guardado sin subir a la BD)' if self.journal.pending else ''}")
+        self.storage.close()
+        if not self.headless: self.text_cache.report(); self.assets.report(); self.audio.report()
+
 if __name__ == "__main__":
-    game = GameEngine()
-    game.run()
\ No newline at end of file
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--headless", type=int, metavar="TICKS", help="simula TICKS pasos sin ventana ni audio (bot de prueba) y sale")
+    ap.add_argument("--seed", type=int)
+    ap.add_argument("--stage", type=int, default=1)
+    ap.add_argument("--player", help=f"jugador de la BD (por defecto RPG_PLAYER o {DEFAULT_PLAYER})")
+    ap.add_argument("--record", metavar="FICHERO", help="graba los comandos de la sesión")
+    ap.add_argument("--replay", metavar="FICHERO", help="repite una grabación sin ventana, a máxima velocidad, y sale")
+    args = ap.parse_args()
+    if args.seed is not None and not 0 <= args.seed < 2 ** 64: ap.error("--seed debe estar entre 0 y 2**64-1 (se graba como u64)")
+    if args.replay:
+        log = InputLog.load(args.replay)
+        game = GameEngine(headless=True, seed=log.seed)
+        stats = game.replay(log)
+        print(f"{stats['ticks']} pasos en {stats['elapsed_s']} s ({stats['ticks_per_s']} pasos/s) | fase {stats['stage']} "
+              f"({stats['state']}), nivel {stats['level']}, XP {stats['xp']}, HP {stats['hp']}, posición {stats['pos']}")
+        game.close()
+    elif args.headless:
+        game = GameEngine(headless=True, seed=args.seed, player=args.player)
+        stats = game.run_headless(args.headless, args.stage)
+        print(f"{stats['ticks']} pasos en {stats['elapsed_s']} s ({stats['ticks_per_s']} pasos/s) | "
+              f"fase máx. {stats['max_stage']}, muertes {stats['deaths']}, victorias {stats['victories']}")
+        game.close()
+    else:
+        game = GameEngine(seed=args.seed, record=args.record, player=args.player)
+        game.run()
\ No newline at end of file
@@ -0,0 +1,94 @@
+import json
+import struct
+
+# --- GRABACIÓN DE ENTRADA (FORMATO BINARIO) ---
+# Cabecera: "RPGI", versión, semilla, longitud del estado inicial (JSON).
+# Después, un byte por paso de simulación:
+#   0xxxxxxx  paso: bits 0-1 dx+1, bits 2-3 dy+1, bits 4-6 acciones (melee, shoot, potion)
+#   0x80 n    empezar la fase n desde el menú
+#   0x81      reiniciar la partida
+#   0x82 n    repetir n veces más el último paso (n <= 255)
+MAGIC = b"RPGI"
+VERSION = 1
+HEADER = struct.Struct("<4sHQI")
+ACTION_BITS = {"melee": 1, "shoot": 2, "potion": 4}
+START, RESET, REPEAT = 0x80, 0x81, 0x82
+
+def encode_tick(move, actions):
+    b = (move[0] + 1) | (move[1] + 1) << 2
+    for a in actions: b |= ACTION_BITS[a] << 4
+    return b
+
+def decode_tick(b):
+    move = ((b & 3) - 1, (b >> 2 & 3) - 1)
+    return move, tuple(a for a, bit in ACTION_BITS.items() if b >> 4 & bit)
+
+class InputRecorder:
+    """
+    Graba los comandos de cada paso (y los arranques de fase del menú) con
+    la semilla y el estado inicial. Los pasos iguales seguidos se guardan
+    como repeticiones, así que una sesión típica ocupa unos pocos KB.
+    """
+    def __init__(self, path, seed, initial, flush_bytes=4096):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.ticks = 0
+        self._buf = bytearray()
+        self._last = None; self._repeat = 0
+        meta = json.dumps(initial, separators=(",", ":")).encode()
+        self._f = open(path, "wb")
+        self._f.write(HEADER.pack(MAGIC, VERSION, seed, len(meta))); self._f.write(meta)
+
+    def tick(self, move, actions):
+        b = encode_tick(move, actions)
+        self.ticks += 1
+        if b == self._last and self._repeat < 255: self._repeat += 1; return
+        self._close_run()
+        self._buf.append(b); self._last = b
+        if len(self._buf) >= self.flush_bytes: self.flush()
+
+    def start(self, stage):
+        self._close_run(); self._buf += bytes((START, stage)); self._last = None
+
+    def reset(self):
+        self._close_run(); self._buf.append(RESET); self._last = None
+
+    def _close_run(self):
+        if self._repeat: self._buf += bytes((REPEAT, self._repeat)); self._repeat = 0
+
+    def flush(self):
+        if self._buf: self._f.write(self._buf); self._buf.clear()
+
+    def close(self):
+        if self._f.closed: return
+        self._close_run(); self.flush(); self._f.close()
+        self._last = None
+
+class InputLog:
+    """Lectura de una grabación: semilla, estado inicial y comandos en orden."""
+    def __init__(self, seed, initial, data):
+        self.seed = seed
+        self.initial = initial
+        self.data = data
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f: raw = f.read()
+        magic, version, seed, meta_len = HEADER.unpack_from(raw)
+        if magic != MAGIC or version != VERSION: raise ValueError(f"{path}: no es una grabación de entrada válida")
+        start = HEADER.size + meta_len
+        return cls(seed, json.loads(raw[HEADER.size:start]), raw[start:])
+
+    def __iter__(self):
+        """("tick", (dx, dy), acciones) | ("start", fase) | ("reset",)"""
+        data, i, last = self.data, 0, None
+        while i < len(data):
+            b = data[i]; i += 1
+            if b < 0x80:
+                last = decode_tick(b); yield ("tick",) + last
+            elif b == REPEAT:
+                for _ in range(data[i]): yield ("tick",) + last
+                i += 1
+            elif b == START: yield ("start", data[i]); i += 1
+            elif b == RESET: yield ("reset",)
+            else: raise ValueError(f"Registro desconocido 0x{b:02x} en la posición {i - 1}")
@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+
+CACHE_PATH = "monster_catalog.cache.json"
+DEFAULT_ROWS = [("Goblin", 30, 5, 2)]
+
+# --- CATÁLOGO DE MONSTRUOS CON CACHÉ LOCAL ---
+class MonsterCatalog:
+    """
+    Catálogo indexado por nombre con las stats ya escaladas por fase.
+    Arranca desde una copia en disco (versionada con la huella del catálogo
+    de la BD) y solo vuelve a leer la tabla si esa huella cambia.
+    Con path=None no se usa copia en disco.
+    """
+    def __init__(self, storage, levels_config, difficulty_mult=1.0, path=CACHE_PATH):
+        self.storage = storage
+        self.levels_config = levels_config
+        self.difficulty_mult = difficulty_mult
+        self.path = path
+        self.version = None
+        self.templates = []        # [{"Name","HP","MaxHP","Attack","Speed"}] en orden de la BD
+        self.by_name = {}
+        self.stage_stats = {}      # fase -> nombre -> (MaxHP, Attack)
+        self._tables = ([], {}, {})
+        self._refresh_thread = None
+
+    # --- Carga ---
+    def load(self):
+        """Usa la caché si existe (y comprueba la versión en segundo plano); si no, va a la BD."""
+        cached = self._read_cache()
+        if cached:
+            self.version = cached["version"]
+            self.set_rows(cached["rows"])
+            print(f"Catálogo desde caché ({len(self.templates)} monstruos)")
+            self._refresh_thread = threading.Thread(target=self.refresh, name="CatalogRefresh", daemon=True)
+            self._refresh_thread.start()
+        else:
+            self.refresh()
+        if not self.templates: self.set_rows(DEFAULT_ROWS)
+
+    def refresh(self):
+        """Relee MonsterCatalog solo si la versión de la BD difiere de la que tenemos."""
+        try:
+            version = self.storage.catalog_version()
+            if version is None or version == self.version: return False
+            rows = [tuple(r) for r in self.storage.load_monsters()]
+        except Exception as e:
+            print(f"Error SQL: {e}")
+            return False
+        if not rows: return False
+        self.version = version
+        self.set_rows(rows)
+        self._write_cache(rows)
+        print(f"Catálogo actualizado desde BD (versión {version})")
+        return True
+
+    def _read_cache(self):
+        if not self.path: return None
+        try:
+            with open(self.path, encoding="utf-8") as f: data = json.load(f)
+            if data.get("version") and data.get("rows"): return data
+        except (OSError, ValueError): pass
+        return None
+
+    def _write_cache(self, rows):
+        if not self.path: return
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": self.version, "rows": [list(r) for r in rows]}, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError as e: print(f"No se pudo escribir la caché del catálogo: {e}")
+
+    # --- Índices ---
+    def set_rows(self, rows):
+        """Reconstruye índices y tablas por fase; se publican de golpe (seguro entre hilos)."""
+        templates = [{"Name": r[0], "HP": r[1], "MaxHP": r[1], "Attack": r[2], "Speed": r[3]} for r in rows]
+        by_name = {}
+        for t in templates: by_name.setdefault(t["Name"], t)
+        stage_stats = {}
+        for stage in self.levels_config:
+            mult = 1 + (stage * 0.1)
+            stage_stats[stage] = {name: (int(t["MaxHP"] * mult * self.difficulty_mult), int(t["Attack"] * mult * self.difficulty_mult))
+                                  for name, t in by_name.items()}
+        self._tables = (templates, by_name, stage_stats)
+        self.templates, self.by_name, self.stage_stats = self._tables
+
+    def set_difficulty(self, difficulty_mult):
+        self.difficulty_mult = difficulty_mult
+        self.set_rows([(t["Name"], t["MaxHP"], t["Attack"], t["Speed"]) for t in self.templates])
+
+    def spawn(self, stage, name):
+        """Copia del monstruo con HP/Attack escalados para la fase (o el primero si no existe)."""
+        templates, by_name, stage_stats = self._tables
+        tmpl = by_name.get(name) or templates[0]
+        enemy = tmpl.copy()
+        max_hp, attack = stage_stats[stage][tmpl["Name"]]
+        enemy["MaxHP"] = enemy["HP"] = max_hp
+        enemy["Attack"] = attack
+        return enemy
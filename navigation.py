@@ -0,0 +1,96 @@
+import time
+from collections import deque
+
+import numpy as np
+
+# Los 8 vecinos como (dx, dy); los enemigos avanzan a la vez en x e y, así que
+# un paso en diagonal cuesta lo mismo que uno recto (distancia de Chebyshev)
+DIRS = np.array([(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)], np.int8)
+
+# --- REJILLA DE NAVEGACIÓN Y CAMPO DE FLUJO ---
+class NavGrid:
+    """
+    Rejilla de celdas de `cell` px construida una vez por fase con los
+    rectángulos de colisión de los obstáculos (ensanchados `clearance` px
+    para que quepa el cuerpo del enemigo). update() recalcula, solo cuando
+    el jugador cambia de celda, la distancia en celdas de todas las celdas
+    hasta él (BFS) y con ella dos campos compartidos por todos los
+    enemigos: `flow`, el paso hacia el jugador, y `away`, el paso que más
+    se aleja de él. Sin pasar esquinas bloqueadas en diagonal.
+    """
+    def __init__(self, size, cell=25, clearance=25):
+        self.cell = cell
+        self.clearance = clearance
+        self.cols = -(-size[0] // cell); self.rows = -(-size[1] // cell)
+        self.blocked = np.zeros((self.rows, self.cols), bool)
+        self.dist = np.full((self.rows, self.cols), np.inf)      # celdas hasta el jugador (inf = inalcanzable)
+        self.flow = np.zeros((self.rows, self.cols, 2), np.int8)
+        self.away = np.zeros((self.rows, self.cols, 2), np.int8)
+        self.field = np.zeros((self.rows * self.cols, 5))           # por celda: flow x/y, away x/y, distancia en px
+        self.target = None
+        self.stats = {"recomputes": 0, "total_ms": 0.0, "last_ms": 0.0, "max_ms": 0.0}
+        self.build(())
+
+    def build(self, rects):
+        """Marca las celdas bloqueadas y prepara los vecinos transitables de cada celda."""
+        c, m = self.cell, self.clearance
+        self.blocked[:] = False
+        for x, y, w, h in rects:
+            self.blocked[max(0, (y - m) // c):max(0, -(-(y + h + m) // c)), max(0, (x - m) // c):max(0, -(-(x + w + m) // c))] = True
+        rows, cols = self.rows, self.cols
+        free = np.pad(~self.blocked, 1)
+        # valid[d, r, c]: se puede pasar de (r, c) a su vecino d
+        valid = np.zeros((len(DIRS), rows, cols), bool)
+        for d, (dx, dy) in enumerate(DIRS.tolist()):
+            ok = free[1 + dy:rows + 1 + dy, 1 + dx:cols + 1 + dx].copy()
+            if dx and dy: ok &= free[1 + dy:rows + 1 + dy, 1:cols + 1] & free[1:rows + 1, 1 + dx:cols + 1 + dx]
+            valid[d] = ok
+        self.valid = valid
+        offsets = (DIRS[:, 1].astype(int) * cols + DIRS[:, 0]).tolist()
+        nbrs = [[] for _ in range(rows * cols)]
+        for d, off in enumerate(offsets):
+            for i in np.flatnonzero(valid[d]).tolist(): nbrs[i].append(i + off)
+        self._neighbors = nbrs
+        self.target = None
+
+    def cell_of(self, x, y):
+        return min(max(int(y) // self.cell, 0), self.rows - 1), min(max(int(x) // self.cell, 0), self.cols - 1)
+
+    def update(self, x, y):
+        """Recalcula los campos si el punto (x, y) cambió de celda. Devuelve True si recalculó."""
+        target = self.cell_of(x, y)
+        if target == self.target: return False
+        t0 = time.perf_counter()
+        self.target = target
+        start = target[0] * self.cols + target[1]
+        d = [-1] * (self.rows * self.cols); d[start] = 0
+        queue = deque((start,)); nbrs = self._neighbors
+        while queue:
+            i = queue.popleft(); nd = d[i] + 1
+            for j in nbrs[i]:
+                if d[j] < 0: d[j] = nd; queue.append(j)
+        dist = np.array(d, np.float64).reshape(self.rows, self.cols)
+        dist[dist < 0] = np.inf
+        self.dist = dist
+        # Distancia de cada vecino transitable (inf/-inf si no se puede pasar)
+        pad = np.pad(dist, 1, constant_values=np.inf)
+        rows, cols = self.rows, self.cols
+        around = np.stack([pad[1 + dy:rows + 1 + dy, 1 + dx:cols + 1 + dx] for dx, dy in DIRS.tolist()])
+        near = np.where(self.valid, around, np.inf)
+        best = near.argmin(axis=0)
+        self.flow = np.where((near.min(axis=0) < dist)[..., None], DIRS[best], 0).astype(np.int8)
+        far = np.where(self.valid & np.isfinite(around), around, -np.inf)
+        worst = far.argmax(axis=0)
+        self.away = np.where((far.max(axis=0) > dist)[..., None], DIRS[worst], 0).astype(np.int8)
+        self.field = np.concatenate((self.flow, self.away, dist[..., None] * self.cell), axis=2).reshape(-1, 5)
+        ms = (time.perf_counter() - t0) * 1000
+        st = self.stats
+        st["recomputes"] += 1; st["total_ms"] += ms; st["last_ms"] = ms; st["max_ms"] = max(st["max_ms"], ms)
+        return True
+
+    def sample(self, x, y):
+        """
+        Para arrays de puntos dentro de la rejilla: filas (flow x, flow y,
+        away x, away y, distancia en px) de la celda de cada uno.
+        """
+        return self.field[(y // self.cell).astype(np.intp) * self.cols + (x // self.cell).astype(np.intp)]
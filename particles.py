@@ -0,0 +1,84 @@
+import numpy as np
+import pygame
+
+# --- SISTEMA DE PARTÍCULAS (estructura de arrays) ---
+class ParticleSystem:
+    """
+    Pool de capacidad fija: posiciones, velocidades, tamaños, vidas y color
+    en arrays de NumPy. update() es vectorial, las muertas se eliminan
+    moviendo vivas del final a sus huecos (swap-remove) y draw() agrupa
+    todo en una sola llamada a blits().
+    """
+    def __init__(self, capacity=4096, seed=None):
+        self.capacity = capacity
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+        self.x = np.zeros(capacity, np.float32)
+        self.y = np.zeros(capacity, np.float32)
+        self.vx = np.zeros(capacity, np.float32)
+        self.vy = np.zeros(capacity, np.float32)
+        self.size = np.zeros(capacity, np.float32)
+        self.life = np.zeros(capacity, np.int16)
+        self.color = np.zeros(capacity, np.uint8)    # índice en self.palette
+        self.palette = []
+        self._squares = {}                           # (color, lado) -> Surface
+        self.dropped = 0
+
+    def __len__(self):
+        return self.count
+
+    def _color_id(self, color):
+        color = tuple(color)
+        if color not in self.palette: self.palette.append(color)
+        return self.palette.index(color)
+
+    def emit(self, x, y, color, n=1):
+        """Mismas distribuciones que la antigua clase Particle: lado 4-8, vida 15-30, v en [-3, 3]."""
+        n_ok = min(n, self.capacity - self.count)
+        self.dropped += n - n_ok
+        if n_ok <= 0: return
+        s = slice(self.count, self.count + n_ok)
+        self.x[s] = x; self.y[s] = y
+        self.vx[s] = self.rng.uniform(-3, 3, n_ok); self.vy[s] = self.rng.uniform(-3, 3, n_ok)
+        self.size[s] = self.rng.integers(4, 9, n_ok)
+        self.life[s] = self.rng.integers(15, 31, n_ok)
+        self.color[s] = self._color_id(color)
+        self.count += n_ok
+
+    def update(self):
+        n = self.count
+        if not n: return
+        self.x[:n] += self.vx[:n]; self.y[:n] += self.vy[:n]
+        self.life[:n] -= 1; self.size[:n] -= 0.1
+
+        dead = np.flatnonzero(self.life[:n] <= 0)
+        if not len(dead): return
+        alive_n = n - len(dead)
+        # Huecos en la parte que se queda <- vivas de la cola
+        holes = dead[dead < alive_n]
+        tail = np.arange(alive_n, n)
+        movers = tail[self.life[alive_n:n] > 0]
+        for arr in (self.x, self.y, self.vx, self.vy, self.size, self.life, self.color):
+            arr[holes] = arr[movers]
+        self.count = alive_n
+
+    def clear(self):
+        self.count = 0
+
+    def _square(self, cid, side):
+        key = (cid, side)
+        surf = self._squares.get(key)
+        if surf is None:
+            surf = pygame.Surface((side, side)); surf.fill(self.palette[cid])
+            self._squares[key] = surf
+        return surf
+
+    def draw(self, surface):
+        n = self.count
+        if not n: return
+        sides = self.size[:n].astype(np.int32)
+        visible = np.flatnonzero(sides > 0)
+        xs = self.x[visible].astype(np.int32).tolist(); ys = self.y[visible].astype(np.int32).tolist()
+        cs = self.color[visible].tolist(); ss = sides[visible].tolist()
+        sq = self._square
+        surface.blits([(sq(c, s), (x, y)) for c, s, x, y in zip(cs, ss, xs, ys)], doreturn=False)
@@ -0,0 +1,126 @@
+import numpy as np
+import pygame
+
+# --- PRESENTACIÓN EN VENTANA (ESCALADO + RECTÁNGULOS SUCIOS) ---
+class Presenter:
+    """
+    Lleva el canvas de 800x600 a la ventana. La geometría (escala, bandas
+    negras) y el destino se calculan solo al cambiar el tamaño de ventana;
+    el canvas se escala directamente dentro de una subsurface de la pantalla.
+    Cada frame se compara el canvas con el anterior por bloques: si nada
+    cambió no se toca la pantalla, y con escala entera (integer_scaling)
+    solo se reescalan y envían a display.update los bloques que cambiaron.
+    """
+    def __init__(self, canvas, tile=40, integer_scaling=False, full_ratio=0.5):
+        self.canvas = canvas
+        self.tile = tile
+        self.integer_scaling = integer_scaling
+        self.full_ratio = full_ratio           # a partir de esta fracción sucia se redibuja entero
+        self.cw, self.ch = canvas.get_size()
+        self._prev = None
+        self._size = None
+        self.stats = {"frames": 0, "full": 0, "partial": 0, "skipped": 0, "tiles": 0}
+        self.resize()
+
+    # --- Geometría ---
+    def resize(self):
+        """Recalcula escala y destino (llamar en VIDEORESIZE / cambio de ventana)."""
+        self.screen = pygame.display.get_surface()
+        win_w, win_h = self._size = self.screen.get_size()
+        scale = min(win_w / self.cw, win_h / self.ch)
+        if self.integer_scaling and scale >= 1: scale = float(int(scale))
+        self.scale = scale
+        self.new_w = int(self.cw * scale); self.new_h = int(self.ch * scale)
+        self.offset_x = (win_w - self.new_w) // 2; self.offset_y = (win_h - self.new_h) // 2
+        self.dest_rect = pygame.Rect(self.offset_x, self.offset_y, self.new_w, self.new_h)
+        self.target = self.screen.subsurface(self.dest_rect) if self.new_w > 0 and self.new_h > 0 else None
+        self.identity = self.new_w == self.cw and self.new_h == self.ch
+        # Con escala entera cada bloque escalado por separado da exactamente los mismos píxeles
+        # que escalar el canvas entero; con escala fraccionaria el muestreo de los bordes varía
+        self.partial_ok = scale == int(scale) and self.new_w == self.cw * int(scale)
+        self.invalidate()
+
+    def invalidate(self):
+        """Fuerza un frame completo (p.ej. tras WINDOWEXPOSED)."""
+        self._prev = None
+
+    def to_game(self, pos):
+        """Coordenadas de ventana -> coordenadas del canvas."""
+        return ((pos[0] - self.offset_x) / self.scale, (pos[1] - self.offset_y) / self.scale)
+
+    # --- Detección de cambios ---
+    def _can_diff(self):
+        t = self.tile
+        return (self.canvas.get_bytesize() == 4 and self.canvas.get_pitch() == self.cw * 4
+                and self.cw % t == 0 and self.ch % t == 0 and t % 8 == 0)
+
+    def _dirty_tiles(self):
+        """Matriz (filas, columnas) de bloques cambiados, o None si toca frame completo."""
+        if not self._can_diff(): return None
+        buf = self.canvas.get_buffer()     # bloquea la Surface hasta soltar buf
+        try:
+            px = np.frombuffer(buf, np.uint32).reshape(self.ch, self.cw)
+            if self._prev is None:
+                self._prev = px.copy(); self._ne = np.empty(px.shape, np.bool_)
+                return None
+            t = self.tile
+            np.not_equal(px, self._prev, out=self._ne)
+            # 8 booleanos por uint64: reducir así es mucho más barato que any() por bloque
+            packed = self._ne.view(np.uint64).reshape(self.ch // t, t, self.cw // 8)
+            diff = packed.max(axis=1).reshape(self.ch // t, self.cw // t, t // 8).max(axis=2) != 0
+            if diff.any(): np.copyto(self._prev, px)
+            return diff
+        finally:
+            del px, buf
+
+    def _rects_from_tiles(self, diff):
+        """Une bloques sucios contiguos de cada fila en rectángulos del canvas."""
+        t = self.tile
+        rects = []
+        for row, line in enumerate(diff.tolist()):
+            x, n = 0, len(line)
+            while x < n:
+                if not line[x]: x += 1; continue
+                start = x
+                while x < n and line[x]: x += 1
+                rects.append(pygame.Rect(start * t, row * t, (x - start) * t, t))
+        return rects
+
+    def _to_screen(self, r):
+        s = self.scale
+        x0 = int(round(r.x * s)); y0 = int(round(r.y * s))
+        x1 = int(round(r.right * s)); y1 = int(round(r.bottom * s))
+        return pygame.Rect(x0, y0, max(0, min(x1, self.new_w) - x0), max(0, min(y1, self.new_h) - y0))
+
+    # --- Presentar ---
+    def _full(self, clear):
+        if clear: self.screen.fill((0, 0, 0))
+        if self.identity: self.target.blit(self.canvas, (0, 0))
+        else: pygame.transform.scale(self.canvas, (self.new_w, self.new_h), self.target)
+        self.stats["full"] += 1
+        if clear: pygame.display.flip()
+        else: pygame.display.update(self.dest_rect)
+
+    def present(self):
+        self.stats["frames"] += 1
+        if pygame.display.get_surface() is not self.screen or self.screen.get_size() != self._size: self.resize()
+        if self.target is None: return
+        first = self._prev is None
+        diff = self._dirty_tiles()
+        if diff is None: return self._full(clear=first)
+
+        n = int(diff.sum())
+        if n == 0:
+            self.stats["skipped"] += 1; return
+        if not self.partial_ok or n > diff.size * self.full_ratio: return self._full(clear=False)
+
+        updated = []
+        for r in self._rects_from_tiles(diff):
+            d = self._to_screen(r)
+            if d.w <= 0 or d.h <= 0: continue
+            src = self.canvas.subsurface(r)
+            if self.identity: self.target.blit(src, d.topleft)
+            else: pygame.transform.scale(src, d.size, self.target.subsurface(d))
+            updated.append(d.move(self.offset_x, self.offset_y))
+        self.stats["partial"] += 1; self.stats["tiles"] += n
+        pygame.display.update(updated)
@@ -0,0 +1,178 @@
+import csv
+import gc
+import json
+import os
+import time
+
+import numpy as np
+
+PHASES = ("events", "update", "draw", "present", "idle")
+COUNTS = ("ticks", "enemies", "particles", "projectiles", "texts")
+FIELDS = ("frame", "t") + PHASES + ("db_ms", "db_calls", "gc_ms", "gc_count", "nav_ms") + COUNTS
+
+# --- PERFILADOR DE FRAMES ---
+class FrameProfiler:
+    """
+    Anillo con los últimos `capacity` frames: ms de cada fase del bucle
+    (eventos, update, dibujo, presentación, espera de clock.tick), ms y
+    llamadas de BD (de todos los hilos), pausas del GC, recálculos del campo
+    de flujo de los enemigos (dentro de update) y entidades vivas.
+    Desactivado no cuesta nada: run() solo le llama si `active` no es None
+    y el callback del GC solo está registrado mientras graba. Con path
+    (.csv o .jsonl) añade al fichero las filas nuevas cada `dump_every` frames.
+    """
+    COLORS = {"events": (241, 196, 15), "update": (46, 204, 113), "draw": (52, 152, 219),
+              "present": (155, 89, 182), "idle": (70, 70, 70)}
+    GRAPH_FRAMES = 150
+    MS_PX = 3                      # px de altura por ms en la gráfica
+
+    def __init__(self, storage=None, capacity=600, path=None, dump_every=300, nav=None):
+        self.storage = storage
+        self.nav = nav
+        self.capacity = capacity
+        self.data = np.zeros((capacity, len(FIELDS)), np.float64)
+        self.col = {f: i for i, f in enumerate(FIELDS)}
+        self.frames = 0
+        self.path = path
+        self.dump_every = dump_every
+        self.overlay = False
+        self.active = None
+        self._dumped = 0
+        self._cur = [0.0] * len(FIELDS)
+        self._t0 = self._last = time.perf_counter()
+        self._db = (0.0, 0)
+        self._nav = 0.0
+        self._gc_start = None; self._gc_ms = 0.0; self._gc_n = 0
+        self._text = None; self._text_frame = -1
+
+    # --- Activación ---
+    def enable(self):
+        if self.active: return
+        gc.callbacks.append(self._on_gc)
+        self._db = self._db_totals()
+        self._nav = self._nav_total()
+        self._last = time.perf_counter()
+        self._cur = [0.0] * len(FIELDS)
+        self.active = self
+
+    def disable(self):
+        if not self.active: return
+        gc.callbacks.remove(self._on_gc)
+        self.active = None
+        self.dump()
+
+    def toggle_overlay(self):
+        """F3: muestra/oculta la gráfica (y graba mientras se ve, o siempre si se exporta)."""
+        self.overlay = not self.overlay
+        if self.overlay: self.enable()
+        elif not self.path: self.disable()
+
+    def _on_gc(self, phase, info):
+        if phase == "start": self._gc_start = time.perf_counter()
+        elif self._gc_start is not None:
+            self._gc_ms += (time.perf_counter() - self._gc_start) * 1000; self._gc_n += 1
+            self._gc_start = None
+
+    def _db_totals(self):
+        st = self.storage
+        return st.totals() if st else (0.0, 0)
+
+    def _nav_total(self):
+        return self.nav.stats["total_ms"] if self.nav else 0.0
+
+    # --- Grabación ---
+    def mark(self, phase):
+        """Cierra la fase `phase` con el tiempo transcurrido desde la marca anterior."""
+        now = time.perf_counter()
+        self._cur[self.col[phase]] += (now - self._last) * 1000
+        self._last = now
+
+    def end_frame(self, ticks, enemies, particles, projectiles, texts):
+        row, c = self._cur, self.col
+        db_time, db_calls = self._db_totals()
+        row[c["db_ms"]] = (db_time - self._db[0]) * 1000; row[c["db_calls"]] = db_calls - self._db[1]
+        self._db = (db_time, db_calls)
+        nav = self._nav_total(); row[c["nav_ms"]] = nav - self._nav; self._nav = nav
+        row[c["gc_ms"]] = self._gc_ms; row[c["gc_count"]] = self._gc_n
+        self._gc_ms = 0.0; self._gc_n = 0
+        row[c["frame"]] = self.frames; row[c["t"]] = self._last - self._t0
+        row[c["ticks"]] = ticks; row[c["enemies"]] = enemies; row[c["particles"]] = particles
+        row[c["projectiles"]] = projectiles; row[c["texts"]] = texts
+        self.data[self.frames % self.capacity] = row
+        self.frames += 1
+        self._cur = [0.0] * len(FIELDS)
+        if self.path and self.frames - self._dumped >= self.dump_every: self.dump()
+
+    def recent(self, n=None):
+        """Últimas n filas (como mucho capacity) en orden cronológico."""
+        n = min(n or self.capacity, self.frames, self.capacity)
+        if not n: return self.data[:0]
+        idx = np.arange(self.frames - n, self.frames) % self.capacity
+        return self.data[idx]
+
+    # --- Exportación ---
+    def dump(self):
+        """Añade al fichero las filas aún no volcadas (las que ya salieron del anillo se pierden)."""
+        if not self.path or self.frames == self._dumped: return
+        rows = self.recent(self.frames - self._dumped)
+        self._dumped = self.frames
+        new = not os.path.exists(self.path)
+        try:
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                if self.path.endswith(".jsonl"):
+                    for r in rows.tolist(): f.write(json.dumps(dict(zip(FIELDS, (round(v, 4) for v in r)))) + "\n")
+                else:
+                    w = csv.writer(f)
+                    if new: w.writerow(FIELDS)
+                    w.writerows([round(v, 4) for v in r] for r in rows.tolist())
+        except OSError as e: print(f"No se pudo volcar el perfil: {e}")
+
+    def summary(self):
+        rows = self.recent()
+        if not len(rows): return None
+        c = self.col
+        work = rows[:, c["events"]:c["idle"]].sum(axis=1)
+        frame = work + rows[:, c["idle"]]
+        return {"frames": self.frames, "fps": 1000 / frame.mean() if frame.mean() else 0,
+                "work_mean_ms": work.mean(), "work_p95_ms": float(np.percentile(work, 95)),
+                "gc_pauses": int(rows[:, c["gc_count"]].sum()), "gc_ms": rows[:, c["gc_ms"]].sum(),
+                "db_ms": rows[:, c["db_ms"]].sum(), "nav_ms": rows[:, c["nav_ms"]].mean()}
+
+    def report(self):
+        s = self.summary()
+        if s: print(f"Perfil: {s['frames']} frames, trabajo {s['work_mean_ms']:.2f} ms de media (p95 {s['work_p95_ms']:.2f} ms), "
+                    f"{s['gc_pauses']} pausas de GC ({s['gc_ms']:.1f} ms), campo de flujo {s['nav_ms']:.3f} ms/frame "
+                    f"en los últimos {min(s['frames'], self.capacity)}")
+
+    # --- Gráfica en pantalla ---
+    def draw(self, surface, font):
+        """Barras apiladas por fase de los últimos frames, línea de 16,7 ms y resumen."""
+        w, h = self.GRAPH_FRAMES * 2, 110
+        x0, y0 = 10, surface.get_height() - h - 10
+        rows = self.recent(self.GRAPH_FRAMES)
+        c = self.col
+        # El texto solo se rehace cada 30 frames (cambia siempre, no pasa por la caché de textos)
+        if self._text is None or self.frames - self._text_frame >= 30:
+            s = self.summary()
+            last = rows[-1].tolist() if len(rows) else [0] * len(FIELDS)
+            lines = [f"{s['fps']:.0f} FPS  p95 {s['work_p95_ms']:.1f} ms  Nav {s['nav_ms']:.2f}" if s else "sin datos",
+                     f"E {int(last[c['enemies']])} P {int(last[c['particles']])} Pr {int(last[c['projectiles']])} "
+                     f"T {int(last[c['texts']])} GC {s['gc_pauses'] if s else 0}"]
+            self._text = [font.render(line, False, (255, 255, 255)) for line in lines]
+            self._text_frame = self.frames
+        panel_w = max([w] + [t.get_width() for t in self._text])
+        surface.fill((0, 0, 0), (x0 - 4, y0 - 34, panel_w + 8, h + 38))
+        for i, t in enumerate(self._text): surface.blit(t, (x0, y0 - 30 + i * 14))
+        base = y0 + h
+        for i, r in enumerate(rows.tolist()):
+            y = base
+            for phase in PHASES:
+                ph = int(r[c[phase]] * self.MS_PX)
+                if ph <= 0: continue
+                ph = min(ph, y - y0)
+                if ph <= 0: break
+                y -= ph
+                surface.fill(self.COLORS[phase], (x0 + i * 2, y, 2, ph))
+            if r[c["gc_count"]]: surface.fill((220, 20, 60), (x0 + i * 2, y0, 2, 4))
+        budget = base - int(1000 / 60 * self.MS_PX)
+        surface.fill((255, 255, 255), (x0, budget, w, 1))
@@ -0,0 +1,69 @@
+import pygame
+
+# --- CAPAS ESTÁTICAS POR FASE ---
+class StageRenderer:
+    """
+    Pre-compone una vez por fase el fondo y los obstáculos en una sola
+    Surface. Los obstáculos se guardan además como oclusores ordenados por
+    profundidad: cada frame solo se vuelven a pintar los que se solapan con
+    algún sprite dinámico, intercalados con ellos por su coordenada y.
+    También guarda los overlays oscuros y el fondo de los menús.
+    """
+    def __init__(self, size, overlay_color):
+        self.size = size
+        self.static = pygame.Surface(size)
+        self.overlay = pygame.Surface(size, pygame.SRCALPHA); self.overlay.fill(overlay_color)
+        self.menu_bg = pygame.Surface(size)
+        self.occluders = []          # [(profundidad, Rect de dibujo, Surface)] ordenados
+        self._occ_rects = []
+        self._stage_key = None
+        self._menu_key = None
+        self.builds = 0
+
+    def invalidate(self):
+        """Llamar cuando cambian obstáculos o llegan imágenes nuevas."""
+        self._stage_key = None; self._menu_key = None
+
+    def prepare_stage(self, key, bg, obstacles, images):
+        if key == self._stage_key: return
+        if bg: self.static.blit(bg, (0, 0))
+        else: self.static.fill((0, 0, 0))
+        occ = []
+        for o in obstacles:
+            img = images.get(o["img"])
+            if not img: continue
+            occ.append((o["pos"][1] + 50, img.get_rect(topleft=o["pos"]), img))
+        occ.sort(key=lambda e: e[0])
+        for _, rect, img in occ: self.static.blit(img, rect)
+        # Cada oclusor es el trozo ya compuesto de la capa estática recortado con la silueta del
+        # obstáculo: repintarlo deja esos píxeles exactamente como en la capa (sin mezclar dos veces).
+        # Solo entran los píxeles de la silueta con alpha > 127: el borde semitransparente llevaría
+        # también el fondo y dejaría un halo de ese color sobre el sprite
+        tops = []
+        bounds = self.static.get_rect()
+        for depth, rect, img in occ:
+            area = rect.clip(bounds)
+            mask = pygame.mask.from_surface(img.subsurface(area.move(-rect.x, -rect.y)), 127)
+            top = mask.to_surface(setsurface=self.static.subsurface(area).convert_alpha(), unsetcolor=(0, 0, 0, 0))
+            tops.append((depth, area, top))
+        self.occluders = tops
+        self._occ_rects = [r for _, r, _ in tops]
+        self._stage_key = key
+        self.builds += 1
+
+    def occluders_over(self, rects):
+        """[(índice, oclusor)] que tocan alguno de los rectángulos dados."""
+        if not self._occ_rects: return []
+        hit = set()
+        for r in rects: hit.update(r.collidelistall(self._occ_rects))
+        return [(i, self.occluders[i]) for i in sorted(hit)]
+
+    def menu_background(self, bg):
+        """Fondo de los menús con el overlay ya aplicado."""
+        key = id(bg)
+        if key != self._menu_key:
+            if bg: self.menu_bg.blit(bg, (0, 0))
+            else: self.menu_bg.fill((0, 0, 0))
+            self.menu_bg.blit(self.overlay, (0, 0))
+            self._menu_key = key
+        return self.menu_bg
@@ -0,0 +1,173 @@
+import os
+import struct
+import threading
+import time
+import zlib
+
+from save_queue import SaveSnapshot
+
+# RPG_JOURNAL_DIR: carpeta de los diarios locales ("" = sin diario)
+JOURNAL_DIR = os.environ.get("RPG_JOURNAL_DIR", "saves")
+
+# --- DIARIO LOCAL DE GUARDADOS (FORMATO BINARIO) ---
+# Cabecera: "RPGJ", versión. Después registros de tamaño fijo:
+#   crc32 del cuerpo | tipo, secuencia, hora, level hp max_hp xp x y unlocked potions
+# Tipo SAVE: foto completa del progreso. Tipo SYNCED: la BD ya tiene hasta esa secuencia.
+MAGIC = b"RPGJ"
+VERSION = 1
+HEADER = struct.Struct("<4sH")
+BODY = struct.Struct("<BQdiiiifffi")
+CRC = struct.Struct("<I")
+RECORD_SIZE = CRC.size + BODY.size
+SAVE, SYNCED = 0, 1
+EMPTY = SaveSnapshot(0, 0, 0, 0, 0, 0, 0, 0)
+
+def journal_path(directory, username):
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in username)
+    return os.path.join(directory, f"{safe}.rpgj")
+
+def pack_record(kind, seq, snap):
+    body = BODY.pack(kind, seq, time.time(), *snap)
+    return CRC.pack(zlib.crc32(body)) + body
+
+class SaveJournal:
+    """
+    Diario de solo añadir con los guardados de un jugador. append() escribe
+    el registro al momento (latencia de disco local, sin esperar a la BD) y
+    un hilo hace fsync agrupando lo que llegue en `group_window` segundos.
+    Al abrir se descarta la cola dañada por un corte. Lo que la BD aún no
+    confirmó (mark_synced) se vuelve a mandar con `replay(seq, snap)` cada
+    `retry_every` segundos, y cada `compact_after` registros el fichero se
+    reescribe con solo el último guardado y su marca de sincronización.
+    """
+    def __init__(self, path, replay=None, group_window=0.05, retry_every=30.0, compact_after=256):
+        self.path = path
+        self.replay = replay
+        self.group_window = group_window
+        self.retry_every = retry_every
+        self.compact_after = compact_after
+        self.latest = None             # (seq, hora, SaveSnapshot) del último guardado
+        self.seq = 0
+        self.synced_seq = 0
+        self.stats = {"appended": 0, "fsyncs": 0, "compactions": 0, "replays": 0, "torn_bytes": 0}
+        self._records = 0
+        self._dirty = False
+        self._stopping = False
+        self._last_sent = time.monotonic()
+        self._cond = threading.Condition()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._recover()
+        self._f = open(path, "ab", buffering=0)
+        self._thread = threading.Thread(target=self._worker, name="SaveJournal", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        """Hay un guardado en el diario que la BD no ha confirmado."""
+        return self.latest is not None and self.latest[0] > self.synced_seq
+
+    # --- Recuperación ---
+    def _recover(self):
+        try:
+            with open(self.path, "rb") as f: raw = f.read()
+        except FileNotFoundError: raw = b""
+        good = 0
+        if len(raw) >= HEADER.size and HEADER.unpack_from(raw) == (MAGIC, VERSION):
+            good = HEADER.size
+            while good + RECORD_SIZE <= len(raw):
+                body = raw[good + CRC.size:good + RECORD_SIZE]
+                if CRC.unpack_from(raw, good)[0] != zlib.crc32(body): break
+                self._apply(BODY.unpack(body))
+                good += RECORD_SIZE; self._records += 1
+        elif raw:
+            os.replace(self.path, self.path + ".bad")
+            print(f"Diario {self.path} ilegible, apartado como .bad")
+        if good == 0:
+            with open(self.path, "wb") as f: f.write(HEADER.pack(MAGIC, VERSION)); os.fsync(f.fileno())
+        elif good < len(raw):
+            self.stats["torn_bytes"] = len(raw) - good
+            print(f"Diario {self.path}: descartados {len(raw) - good} bytes de un guardado a medias")
+            with open(self.path, "r+b") as f: f.truncate(good); os.fsync(f.fileno())
+
+    def _apply(self, rec):
+        kind, seq, t, *values = rec
+        if kind == SAVE:
+            self.latest = (seq, t, SaveSnapshot(*values)); self.seq = max(self.seq, seq)
+        elif kind == SYNCED:
+            self.synced_seq = max(self.synced_seq, seq)
+
+    # --- Escritura ---
+    def append(self, snap):
+        """Añade una foto completa y devuelve su número de secuencia."""
+        with self._cond:
+            self.seq += 1
+            self._f.write(pack_record(SAVE, self.seq, snap))
+            self.latest = (self.seq, time.time(), snap)
+            self._records += 1; self.stats["appended"] += 1
+            self._last_sent = time.monotonic()
+            self._dirty = True
+            self._cond.notify_all()
+            return self.seq
+
+    def mark_synced(self, seq):
+        """La BD confirmó el guardado `seq` (y todos los anteriores)."""
+        with self._cond:
+            if seq <= self.synced_seq or self._f.closed: return
+            self.synced_seq = seq
+            self._f.write(pack_record(SYNCED, seq, EMPTY))
+            self._records += 1
+            self._dirty = True
+            self._cond.notify_all()
+
+    # --- Hilo: fsync agrupado, reenvío a la BD y compactación ---
+    def _worker(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._dirty or self._stopping, self.retry_every if self.pending else None)
+                stopping = self._stopping
+            if self._dirty:
+                if not stopping: time.sleep(self.group_window)   # los guardados que lleguen mientras tanto van en el mismo fsync
+                self._sync()
+            if self.pending and self.replay and not stopping and time.monotonic() - self._last_sent >= self.retry_every:
+                seq, _, snap = self.latest
+                self._last_sent = time.monotonic(); self.stats["replays"] += 1
+                try: self.replay(seq, snap)
+                except Exception as e: print(f"Error reenviando el diario: {e}")
+            if self._records >= self.compact_after: self._compact()
+            if stopping: return
+
+    def _sync(self):
+        with self._cond:
+            if not self._dirty: return
+            self._dirty = False
+            fd = self._f.fileno()
+        os.fsync(fd)
+        self.stats["fsyncs"] += 1
+
+    def _compact(self):
+        """Reescribe el diario con solo el último guardado (y su marca si ya está en la BD)."""
+        with self._cond:
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(HEADER.pack(MAGIC, VERSION))
+                n = 0
+                if self.latest:
+                    f.write(pack_record(SAVE, self.latest[0], self.latest[2])); n += 1
+                if self.synced_seq:
+                    f.write(pack_record(SYNCED, self.synced_seq, EMPTY)); n += 1
+                f.flush(); os.fsync(f.fileno())
+            self._f.close()
+            os.replace(tmp, self.path)
+            self._f = open(self.path, "ab", buffering=0)
+            self._records = n; self._dirty = False
+            self.stats["compactions"] += 1
+
+    def close(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(2.0)
+        with self._cond:
+            if self._f.closed: return
+            if self._dirty: os.fsync(self._f.fileno()); self.stats["fsyncs"] += 1
+            self._f.close()
@@ -0,0 +1,147 @@
+import math
+import threading
+import time
+from collections import namedtuple
+
+# Foto inmutable del progreso que se persiste
+SaveSnapshot = namedtuple("SaveSnapshot", "level hp max_hp xp x y unlocked potions")
+# Guardado parcial: valores de snap, pero solo se escriben `fields` (None = todos).
+# seq: número del guardado en el diario local (None si no hay diario)
+SaveDelta = namedtuple("SaveDelta", "snap fields seq", defaults=(None,))
+
+def merge_deltas(old, new):
+    """Dos guardados pendientes se funden en uno: valores del nuevo, columnas de ambos."""
+    if old.fields is None or new.fields is None: return SaveDelta(new.snap, None, new.seq)
+    return SaveDelta(new.snap, tuple(f for f in SaveSnapshot._fields if f in old.fields or f in new.fields), new.seq)
+
+# --- GUARDADOS INCREMENTALES ---
+class DeltaTracker:
+    """
+    Recuerda lo último enviado a la BD y decide qué columnas hay que
+    escribir. Si nada cambió no hay guardado. La posición cambia casi cada
+    paso, así que por sí sola solo se guarda cada `position_interval`
+    segundos de `clock`; si hay otro cambio viaja con él.
+    """
+    THROTTLED = ("x", "y")
+
+    def __init__(self, position_interval=10.0, clock=time.monotonic):
+        self.position_interval = position_interval
+        self.clock = clock
+        self.base = None               # SaveSnapshot ya enviada; None = desconocida (se escribe todo)
+        self.last_position = -math.inf
+        self.stats = {"issued": 0, "skipped": 0, "throttled": 0, "full": 0, "columns": 0}
+
+    def set_base(self, snap):
+        self.base = snap
+
+    def invalidate(self, *_):
+        """Tras perder un guardado ya no se sabe qué hay en la BD: el siguiente va completo."""
+        self.base = None
+
+    def delta(self, snap):
+        """SaveDelta a encolar, o None si no hace falta guardar."""
+        now = self.clock()
+        fields = None
+        if self.base is not None:
+            fields = tuple(f for f, new, old in zip(SaveSnapshot._fields, snap, self.base) if new != old)
+            if not any(f not in self.THROTTLED for f in fields):
+                if not fields or now - self.last_position < self.position_interval:
+                    self.stats["skipped"] += 1
+                    if fields: self.stats["throttled"] += 1
+                    return None
+        if fields is None or any(f in self.THROTTLED for f in fields): self.last_position = now
+        self.base = snap
+        self.stats["issued"] += 1
+        if fields is None: self.stats["full"] += 1
+        else: self.stats["columns"] += len(fields)
+        return SaveDelta(snap, fields)
+
+# --- COLA DE GUARDADO EN SEGUNDO PLANO ---
+class SaveQueue:
+    """
+    Guardado write-behind: el juego encola snapshots y un hilo los escribe.
+    Si llegan varios seguidos solo se escribe el más reciente (o la fusión
+    de ambos con `merge`). Los fallos se reintentan con backoff exponencial
+    y si se agotan los intentos se avisa a `on_drop`.
+    """
+    def __init__(self, writer, max_retries=5, base_delay=0.25, max_delay=4.0, merge=None, on_drop=None):
+        self.writer = writer           # writer(snapshot) -> bool
+        self.merge = merge             # merge(anterior, nuevo) -> lo que se escribe en su lugar
+        self.on_drop = on_drop
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._pending = None
+        self._in_flight = False
+        self._stopping = False
+        self._cond = threading.Condition()
+        self.last_error = False
+        self.stats = {"submitted": 0, "coalesced": 0, "committed": 0, "retries": 0, "dropped": 0}
+        self._thread = threading.Thread(target=self._worker, name="SaveQueue", daemon=True)
+        self._thread.start()
+
+    @property
+    def busy(self):
+        return self._pending is not None or self._in_flight
+
+    def submit(self, snapshot):
+        with self._cond:
+            if self._pending is not None:
+                self.stats["coalesced"] += 1
+                if self.merge: snapshot = self.merge(self._pending, snapshot)
+            self._pending = snapshot
+            self.stats["submitted"] += 1
+            self._cond.notify_all()
+
+    def _write(self, snapshot):
+        try: return bool(self.writer(snapshot))
+        except Exception as e:
+            print(f"Error guardando: {e}")
+            return False
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopping: self._cond.wait()
+                if self._pending is None: return
+                snap, self._pending = self._pending, None
+                self._in_flight = True
+
+            attempt = 0
+            while True:
+                if self._write(snap):
+                    self.last_error = False; self.stats["committed"] += 1
+                    break
+                self.last_error = True
+                attempt += 1
+                if attempt > self.max_retries:
+                    self.stats["dropped"] += 1; print("Guardado descartado tras varios intentos.")
+                    if self.on_drop: self.on_drop(snap)
+                    break
+                self.stats["retries"] += 1
+                delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+                with self._cond:
+                    # Un snapshot más nuevo sustituye al que estamos reintentando
+                    self._cond.wait_for(lambda: self._pending is not None or self._stopping, delay)
+                    if self._pending is not None:
+                        snap, self._pending = (self.merge(snap, self._pending) if self.merge else self._pending), None
+                        self.stats["coalesced"] += 1; attempt = 0
+                    elif self._stopping:
+                        break
+
+            with self._cond:
+                self._in_flight = False
+                self._cond.notify_all()
+
+    def flush(self, timeout=3.0):
+        """Espera a que se escriba todo lo pendiente. Devuelve False si vence el plazo."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self.busy, timeout)
+
+    def stop(self, timeout=3.0):
+        ok = self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(0.5)
+        return ok
@@ -54,10 +54,15 @@ CREATE TABLE [dbo].[SaveGames] (
     [PositionX] DECIMAL(10,2) DEFAULT 0.0,
     [PositionY] DECIMAL(10,2) DEFAULT 0.0,
     [PositionZ] DECIMAL(10,2) DEFAULT 1.0, -- Mapa Desbloqueado
+    [Potions] INT NOT NULL DEFAULT 3,
     [LastSaved] DATETIME2 DEFAULT GETDATE()
 );
 GO
 
+-- Una partida por jugador: el juego busca y actualiza por PlayerID (MERGE)
+CREATE UNIQUE NONCLUSTERED INDEX [UX_SaveGames_PlayerID] ON [dbo].[SaveGames]([PlayerID]);
+GO
+
 -- TABLA MONSTRUOS
 CREATE TABLE [dbo].[MonsterCatalog] (
     [MonsterID] INT IDENTITY(1,1) PRIMARY KEY,
@@ -71,6 +76,28 @@ CREATE TABLE [dbo].[MonsterCatalog] (
 );
 GO
 
+CREATE NONCLUSTERED INDEX [IX_MonsterCatalog_ElementID] ON [dbo].[MonsterCatalog]([ElementID]);
+GO
+
+-- TABLA EVENTOS DE JUEGO (telemetría para balanceo y clasificaciones, se inserta por lotes)
+CREATE TABLE [dbo].[GameEvents] (
+    [EventID] BIGINT IDENTITY(1,1) PRIMARY KEY,
+    [PlayerID] INT NOT NULL FOREIGN KEY REFERENCES [dbo].[Players]([PlayerID]),
+    [EventType] VARCHAR(20) NOT NULL, -- kill, damage, hurt, level_up, potion, stage_clear
+    [Stage] INT NOT NULL,
+    [Value] INT NOT NULL,
+    [Detail] VARCHAR(50) NULL,
+    [SimTimeMs] BIGINT NOT NULL,
+    [CreatedAt] DATETIME2 DEFAULT GETDATE()
+);
+GO
+
+CREATE NONCLUSTERED INDEX [IX_GameEvents_Type_Stage] ON [dbo].[GameEvents]([EventType], [Stage]) INCLUDE ([PlayerID], [Value]);
+GO
+
+CREATE NONCLUSTERED INDEX [IX_GameEvents_PlayerID] ON [dbo].[GameEvents]([PlayerID]);
+GO
+
 -- =====================================================
 -- INSERCIÓN DE DATOS (SEEDING)
 -- =====================================================
@@ -0,0 +1,84 @@
+-- =====================================================
+-- Retro RPG - ESQUEMA SQLITE (equivalente a setup_database.sql)
+-- Idempotente: se ejecuta cada vez que se abre la base local
+-- =====================================================
+
+-- TABLA ELEMENTOS
+CREATE TABLE IF NOT EXISTS Elements (
+    ElementID INTEGER PRIMARY KEY AUTOINCREMENT,
+    ElementName VARCHAR(50) NOT NULL UNIQUE,
+    Description VARCHAR(255) NULL
+);
+
+-- TABLA JUGADORES
+CREATE TABLE IF NOT EXISTS Players (
+    PlayerID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Username VARCHAR(50) NOT NULL UNIQUE,
+    PasswordHash VARCHAR(255) NOT NULL,
+    Email VARCHAR(100) NULL,
+    CreatedDate DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- TABLA PARTIDAS GUARDADAS
+CREATE TABLE IF NOT EXISTS SaveGames (
+    SaveGameID INTEGER PRIMARY KEY AUTOINCREMENT,
+    PlayerID INTEGER NOT NULL REFERENCES Players(PlayerID),
+    Level INTEGER DEFAULT 1,
+    ExperiencePoints INTEGER DEFAULT 0,
+    CurrentHP INTEGER NOT NULL,
+    MaxHP INTEGER NOT NULL,
+    PositionX DECIMAL(10,2) DEFAULT 0.0,
+    PositionY DECIMAL(10,2) DEFAULT 0.0,
+    PositionZ DECIMAL(10,2) DEFAULT 1.0, -- Mapa Desbloqueado
+    Potions INTEGER DEFAULT 3,
+    LastSaved DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Una partida por jugador: el juego busca y actualiza por PlayerID (upsert)
+CREATE UNIQUE INDEX IF NOT EXISTS UX_SaveGames_PlayerID ON SaveGames(PlayerID);
+
+-- TABLA MONSTRUOS
+CREATE TABLE IF NOT EXISTS MonsterCatalog (
+    MonsterID INTEGER PRIMARY KEY AUTOINCREMENT,
+    MonsterName VARCHAR(100) NOT NULL,
+    ElementID INTEGER NOT NULL,
+    BaseHP INTEGER NOT NULL,
+    BaseAttack INTEGER NOT NULL,
+    BaseDefense INTEGER NOT NULL,
+    BaseSpeed INTEGER NOT NULL,
+    Description VARCHAR(500) NULL
+);
+
+CREATE INDEX IF NOT EXISTS IX_MonsterCatalog_ElementID ON MonsterCatalog(ElementID);
+
+-- TABLA EVENTOS DE JUEGO (telemetría para balanceo y clasificaciones, se inserta por lotes)
+CREATE TABLE IF NOT EXISTS GameEvents (
+    EventID INTEGER PRIMARY KEY AUTOINCREMENT,
+    PlayerID INTEGER NOT NULL REFERENCES Players(PlayerID),
+    EventType VARCHAR(20) NOT NULL, -- kill, damage, hurt, level_up, potion, stage_clear
+    Stage INTEGER NOT NULL,
+    Value INTEGER NOT NULL,
+    Detail VARCHAR(50) NULL,
+    SimTimeMs INTEGER NOT NULL,
+    CreatedAt DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS IX_GameEvents_Type_Stage ON GameEvents(EventType, Stage);
+CREATE INDEX IF NOT EXISTS IX_GameEvents_PlayerID ON GameEvents(PlayerID);
+
+-- =====================================================
+-- INSERCIÓN DE DATOS (SEEDING) - solo si están vacías
+-- =====================================================
+
+INSERT OR IGNORE INTO Elements (ElementName, Description) VALUES
+('Fire', 'Fuego'),
+('Water', 'Agua'),
+('Plant', 'Planta');
+
+INSERT INTO MonsterCatalog (MonsterName, ElementID, BaseHP, BaseAttack, BaseDefense, BaseSpeed, Description)
+SELECT * FROM (
+    SELECT 'Goblin', 3, 30, 5, 2, 2, 'Un habitante basico del bosque.' UNION ALL
+    SELECT 'Brain', 2, 20, 10, 0, 4, 'Enemigo psiquico que dispara energia.' UNION ALL
+    SELECT 'Shadow', 1, 50, 15, 5, 3, 'Se teletransporta y ataca rapido.' UNION ALL
+    SELECT 'Ogre', 1, 150, 25, 10, 1, 'El Jefe Final. Lento pero mortal.'
+) WHERE NOT EXISTS (SELECT 1 FROM MonsterCatalog);
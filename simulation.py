@@ -0,0 +1,71 @@
+import math
+import time
+
+TICK_RATE = 60                 # pasos de simulación por segundo (independiente de los FPS)
+TICK_DT = 1.0 / TICK_RATE
+MAX_TICKS_PER_FRAME = 5        # tras un parón no se intenta recuperar más de esto
+
+# --- RELOJES INYECTABLES ---
+class ManualClock:
+    """Reloj que solo avanza cuando se le pide (pruebas, repeticiones)."""
+    def __init__(self, start=0.0):
+        self.t = start
+    def __call__(self):
+        return self.t
+    def advance(self, dt):
+        self.t += dt
+
+# --- PASO FIJO ---
+class FixedStep:
+    """
+    Acumulador de paso fijo: el reloj (cualquier callable que devuelva
+    segundos) dice cuánto tiempo real pasó y ticks() cuántos pasos de
+    simulación tocan. alpha es la fracción del siguiente paso ya
+    transcurrida, para interpolar el dibujo entre los dos últimos estados.
+    """
+    def __init__(self, clock=time.perf_counter, dt=TICK_DT, max_ticks=MAX_TICKS_PER_FRAME):
+        self.clock = clock
+        self.dt = dt
+        self.max_ticks = max_ticks
+        self.acc = 0.0
+        self.last = clock()
+        self.dropped = 0.0             # segundos descartados por ir por detrás
+
+    def reset(self):
+        self.acc = 0.0; self.last = self.clock()
+
+    def ticks(self):
+        now = self.clock()
+        self.acc += now - self.last; self.last = now
+        n = min(int(self.acc / self.dt), self.max_ticks)
+        self.acc -= n * self.dt
+        if self.acc >= self.dt:        # espiral de la muerte: se pierde el retraso sobrante
+            self.dropped += self.acc - self.acc % self.dt
+            self.acc %= self.dt
+        return n
+
+    @property
+    def alpha(self):
+        return self.acc / self.dt
+
+# --- BOT DE PRUEBA ---
+def chase_bot(game):
+    """
+    Política sencilla para las ejecuciones sin ventana: va a por el enemigo
+    más cercano, golpea cuerpo a cuerpo si está al alcance, dispara cada
+    cierto tiempo y bebe poción con poca vida. Devuelve (dx, dy), acciones.
+    """
+    actions = []
+    if game.player_stats["HP"] < game.player_stats["MaxHP"] * 0.3: actions.append("potion")
+    en = game.enemies
+    slots = en.slots()
+    if not slots: return (0, 0), actions
+    px, py = game.player_x + 20, game.player_y + 20
+    best = min(slots, key=lambda s: (en.rects[s].centerx - px) ** 2 + (en.rects[s].centery - py) ** 2)
+    r = en.rects[best]
+    dx, dy = r.centerx - px, r.centery - py
+    if math.hypot(dx, dy) < 70 + max(r.w, r.h) / 2:
+        if game.ticks % 10 == 0: actions.append("melee")
+    elif game.ticks % 20 == 0: actions.append("shoot")
+    move = ((dx > 8) - (dx < -8), (dy > 8) - (dy < -8))
+    return move, actions
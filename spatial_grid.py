@@ -0,0 +1,102 @@
+import math
+
+# --- ÍNDICE ESPACIAL (REJILLA UNIFORME) ---
+class SpatialGrid:
+    """
+    Hash espacial de celdas fijas. Cada entidad se registra con una clave,
+    su Rect y una etiqueta ("player", "enemy", "proj", "eproj", "obs"...).
+    update() solo toca las celdas si la entidad cambió de celda.
+    """
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self._cells = {}     # (cx, cy) -> set(claves)
+        self._rects = {}     # clave -> Rect (la misma instancia que mueve el juego)
+        self._tags = {}      # clave -> etiqueta
+        self._spans = {}     # clave -> (cx0, cy0, cx1, cy1)
+
+    def __len__(self):
+        return len(self._rects)
+
+    def __contains__(self, key):
+        return key in self._rects
+
+    def _span(self, rect):
+        cs = self.cell_size
+        return (rect.x // cs, rect.y // cs, (rect.right - 1) // cs, (rect.bottom - 1) // cs)
+
+    def _link(self, key, span):
+        cells = self._cells
+        for cx in range(span[0], span[2] + 1):
+            for cy in range(span[1], span[3] + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None: cells[(cx, cy)] = {key}
+                else: bucket.add(key)
+
+    def _unlink(self, key, span):
+        cells = self._cells
+        for cx in range(span[0], span[2] + 1):
+            for cy in range(span[1], span[3] + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket: del cells[(cx, cy)]
+
+    def insert(self, key, rect, tag=None):
+        if key in self._rects: self.remove(key)
+        span = self._span(rect)
+        self._rects[key] = rect; self._tags[key] = tag; self._spans[key] = span
+        self._link(key, span)
+
+    def update(self, key, rect=None):
+        """Reindexa tras mover la entidad (rect=None usa el Rect ya registrado)."""
+        if rect is not None: self._rects[key] = rect
+        else: rect = self._rects[key]
+        span = self._span(rect)
+        old = self._spans[key]
+        if span != old:
+            self._unlink(key, old); self._link(key, span)
+            self._spans[key] = span
+
+    def remove(self, key):
+        if key not in self._rects: return
+        self._unlink(key, self._spans.pop(key))
+        del self._rects[key]; del self._tags[key]
+
+    def clear(self):
+        self._cells.clear(); self._rects.clear(); self._tags.clear(); self._spans.clear()
+
+    def _candidates(self, span):
+        cells = self._cells
+        if span[0] == span[2] and span[1] == span[3]:   # caso habitual: una sola celda
+            return cells.get((span[0], span[1]), ())
+        found = set()
+        for cx in range(span[0], span[2] + 1):
+            for cy in range(span[1], span[3] + 1):
+                bucket = cells.get((cx, cy))
+                if bucket: found |= bucket
+        return found
+
+    def query_rect(self, rect, tags=None, exclude=None):
+        """Claves cuyo Rect choca con `rect` (opcionalmente filtradas por etiqueta)."""
+        hits = []
+        for key in self._candidates(self._span(rect)):
+            if key == exclude or (tags is not None and self._tags[key] not in tags): continue
+            if self._rects[key].colliderect(rect): hits.append(key)
+        return hits
+
+    def query_radius(self, cx, cy, radius, tags=None, exclude=None):
+        """Claves cuyo Rect toca el círculo de centro (cx, cy)."""
+        cs = self.cell_size
+        span = (int(math.floor((cx - radius) / cs)), int(math.floor((cy - radius) / cs)),
+                int(math.floor((cx + radius) / cs)), int(math.floor((cy + radius) / cs)))
+        r2 = radius * radius
+        hits = []
+        for key in self._candidates(span):
+            if key == exclude or (tags is not None and self._tags[key] not in tags): continue
+            r = self._rects[key]
+            dx = cx - max(r.left, min(cx, r.right)); dy = cy - max(r.top, min(cy, r.bottom))
+            if dx * dx + dy * dy <= r2: hits.append(key)
+        return hits
+
+    def tag(self, key):
+        return self._tags.get(key)
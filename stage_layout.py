@@ -0,0 +1,71 @@
+import random
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+# Zona libre alrededor del punto de partida del jugador
+SAFE_ZONE = (350, 250, 150, 150)
+
+# obstacles: ((x, y) de dibujo, (x, y, w, h) de colisión) por obstáculo
+# spawns: {(w, h): array (N, 2) de esquinas válidas para un enemigo de ese tamaño}
+StageLayout = namedtuple("StageLayout", "stage seed obstacles spawns gen_ms")
+
+def stage_seed(seed, stage):
+    """Semilla propia de cada fase: la misma partida repite el mismo mapa."""
+    return (seed * 1_000_003 + stage) & 0xFFFFFFFF
+
+def _overlaps(a, b):
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+# --- GENERADOR DE MAPAS ---
+@lru_cache(maxsize=64)
+def stage_layout(stage, seed, size=(800, 600), count=12, min_dist=70, attempts=8,
+                 enemy_sizes=((50, 50), (150, 150)), spawn_step=10):
+    """
+    Obstáculos por muestreo en rejilla con jitter: la zona jugable se parte
+    en celdas, se recorren en orden aleatorio y en cada una se prueban como
+    mucho `attempts` puntos que respeten la zona libre y una distancia
+    mínima entre obstáculos (disco de Poisson). Termina siempre, aunque en
+    un mapa muy lleno puede colocar menos de `count`. Después se calculan
+    las posiciones de aparición válidas (dentro de pantalla, fuera de la
+    zona libre y sin pisar obstáculos) para cada tamaño de enemigo.
+    Cacheado por (fase, semilla): reinicios y benchmarks no lo repiten.
+    """
+    t0 = time.perf_counter()
+    w, h = size
+    rng = random.Random(stage_seed(seed, stage))
+    x0, x1, y0, y1 = 50, w - 100, 100, h - 100          # mismo rango que el generador original
+    cols = max(1, int((x1 - x0) / min_dist)); rows = max(1, int((y1 - y0) / min_dist))
+    cw, ch = (x1 - x0) / cols, (y1 - y0) / rows
+    cells = [(c, r) for r in range(rows) for c in range(cols)]
+    rng.shuffle(cells)
+    placed = []
+    for c, r in cells:
+        if len(placed) >= count: break
+        for _ in range(attempts):
+            ox, oy = int(x0 + (c + rng.random()) * cw), int(y0 + (r + rng.random()) * ch)
+            hit = (ox + 10, oy + 40, 30, 20)
+            if _overlaps(hit, SAFE_ZONE): continue
+            if any((ox - px) ** 2 + (oy - py) ** 2 < min_dist ** 2 for (px, py), _ in placed): continue
+            placed.append(((ox, oy), hit)); break
+    spawns = {}
+    blocked = [SAFE_ZONE] + [hit for _, hit in placed]
+    for ew, eh in enemy_sizes:
+        xs = np.arange(x0, min(x1, w - ew) + 1, spawn_step)
+        ys = np.arange(y0, min(y1, h - eh) + 1, spawn_step)
+        gx, gy = np.meshgrid(xs, ys)
+        ok = np.ones(gx.shape, bool)
+        for bx, by, bw, bh in blocked:
+            ok &= ~((gx < bx + bw) & (bx < gx + ew) & (gy < by + bh) & (by < gy + eh))
+        spawns[(ew, eh)] = np.column_stack((gx[ok], gy[ok]))
+    return StageLayout(stage, seed, tuple(placed), spawns, (time.perf_counter() - t0) * 1000)
+
+def pick_spawn(layout, size, rng, player, min_dist=200):
+    """Esquina de aparición a más de min_dist del jugador (o la más lejana si no hay ninguna)."""
+    pts = layout.spawns[size]
+    d2 = ((pts - player) ** 2).sum(axis=1)
+    far = np.flatnonzero(d2 > min_dist ** 2)
+    i = far[rng.randrange(len(far))] if len(far) else int(d2.argmax())
+    return int(pts[i, 0]), int(pts[i, 1])
@@ -0,0 +1,89 @@
+import threading
+import time
+
+# --- ARRANQUE CONCURRENTE ---
+class StartupPipeline:
+    """
+    Tareas de arranque con dependencias. Las de fondo arrancan cada una en
+    su hilo (daemon: una BD colgada no impide cerrar) en cuanto terminan
+    sus dependencias; las de hilo principal (fuentes, Surfaces) las ejecuta
+    poll() de una en una, una por frame, para no retrasar el dibujo. Una
+    tarea que falla cuenta como terminada (el error queda en `errors`) y
+    sus dependientes siguen con lo que haya. Guarda inicio y fin de cada
+    tarea y las marcas del juego (primer frame, interactivo) en ms desde
+    la creación.
+    """
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.t0 = clock()
+        self.tasks = {}                # nombre -> (fn, dependencias, hilo principal)
+        self.times = {}                # nombre -> [inicio ms, fin ms | None]
+        self.errors = {}
+        self.marks = {}                # "first_frame", "interactive"... -> ms
+        self.reported = False
+        self._done = set()
+        self._main = []                # tareas de hilo principal listas para poll()
+        self._cond = threading.Condition()
+
+    def ms(self):
+        return (self.clock() - self.t0) * 1000
+
+    def add(self, name, fn, deps=(), main_thread=False):
+        self.tasks[name] = (fn, tuple(deps), main_thread)
+
+    def start(self):
+        with self._cond: self._launch()
+
+    def _launch(self):
+        # Con el lock tomado: lanza lo que tenga las dependencias resueltas
+        for name, (fn, deps, main) in self.tasks.items():
+            if name in self.times or name in self._main or not all(d in self._done for d in deps): continue
+            if main: self._main.append(name); continue
+            self.times[name] = [self.ms(), None]
+            threading.Thread(target=self._run, args=(name,), name=f"Startup-{name}", daemon=True).start()
+
+    def _run(self, name):
+        try: self.tasks[name][0]()
+        except Exception as e:
+            self.errors[name] = e
+            print(f"Error en el arranque ({name}): {e}")
+        with self._cond:
+            self.times[name][1] = self.ms()
+            self._done.add(name)
+            self._launch()
+            self._cond.notify_all()
+
+    def poll(self):
+        """Hilo principal: ejecuta como mucho una tarea de hilo principal pendiente."""
+        with self._cond:
+            if not self._main: return False
+            name = self._main.pop(0)
+            self.times[name] = [self.ms(), None]
+        self._run(name)
+        return True
+
+    def done(self, *names):
+        return all(n in self._done for n in (names or self.tasks))
+
+    def wait(self, names=(), timeout=None):
+        """Hilo principal: espera a esas tareas (o a todas) ejecutando las de hilo principal. False si vence el plazo."""
+        end = None if timeout is None else time.monotonic() + timeout
+        while not self.done(*names):
+            if self.poll(): continue
+            left = None if end is None else end - time.monotonic()
+            if left is not None and left <= 0: return False
+            with self._cond: self._cond.wait_for(lambda: self._main or self.done(*names), left)
+        return True
+
+    def mark(self, name):
+        """Marca un hito la primera vez que se alcanza."""
+        if name not in self.marks: self.marks[name] = self.ms()
+
+    def report(self):
+        self.reported = True
+        for name, (start, end) in sorted(self.times.items(), key=lambda kv: kv[1][0]):
+            where = "principal" if self.tasks[name][2] else "fondo"
+            took = f"{end - start:.1f} ms" if end is not None else "en curso"
+            print(f"  {name}: desde {start:.1f} ms, {took} ({where}){' ERROR' if name in self.errors else ''}")
+        marks = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.marks.items())
+        print(f"Arranque: {marks}")
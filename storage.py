@@ -0,0 +1,345 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from functools import lru_cache
+
+# --- CONFIGURACIÓN ---
+# RPG_DB_BACKEND: "sqlserver" (por defecto) o "sqlite"
+DB_BACKEND = os.environ.get("RPG_DB_BACKEND", "sqlserver")
+SQLITE_PATH = os.environ.get("RPG_SQLITE_PATH", "retro_rpg.db")
+SQLITE_SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "setup_database_sqlite.sql")
+
+# Campo de SaveSnapshot -> columna de SaveGames (PositionZ guarda el mapa desbloqueado)
+SAVE_COLUMNS = {"level": "Level", "hp": "CurrentHP", "max_hp": "MaxHP", "xp": "ExperiencePoints",
+                "x": "PositionX", "y": "PositionY", "unlocked": "PositionZ", "potions": "Potions"}
+
+@lru_cache(maxsize=None)
+def update_sql(fields, now):
+    """UPDATE por PlayerID de solo esas columnas; cacheado por conjunto de campos."""
+    cols = ", ".join(f"{SAVE_COLUMNS[f]}=?" for f in fields)
+    return f"UPDATE SaveGames SET {cols}, LastSaved={now} WHERE PlayerID = ?"
+
+def update_args(player_id, snap, fields):
+    return [getattr(snap, f) for f in fields] + [player_id]
+
+EVENT_COLUMNS = "(PlayerID, EventType, Stage, Value, Detail, SimTimeMs)"
+
+# --- CAPA DE PERSISTENCIA ---
+class Storage:
+    """
+    API neutral de persistencia (jugadores, partidas y catálogo de monstruos).
+    Cada backend implementa los métodos _*; aquí se miden las latencias.
+    """
+    name = "base"
+
+    def __init__(self):
+        self.timings = {}   # operacion -> [llamadas, segundos]
+        self.total_calls = 0
+        self.total_time = 0.0  # segundos acumulados en la BD (todos los hilos), lo lee el perfilador
+        self._timing_lock = threading.Lock()   # los actualizan los hilos de guardado, eventos y arranque
+
+    @contextmanager
+    def timed(self, op):
+        start = time.perf_counter()
+        try: yield
+        finally:
+            dt = time.perf_counter() - start
+            with self._timing_lock:
+                t = self.timings.setdefault(op, [0, 0.0])
+                t[0] += 1; t[1] += dt
+                self.total_calls += 1; self.total_time += dt
+
+    def totals(self):
+        """(segundos, llamadas) acumulados en la BD, leídos de forma consistente."""
+        with self._timing_lock: return self.total_time, self.total_calls
+
+    def load_or_create_player(self, username):
+        """
+        Crea jugador y partida si no existen y los devuelve en un solo viaje:
+        {"PlayerID","SaveGameID","Level","HP","MaxHP","XP","Unlocked","Potions"} o None si no hay BD.
+        """
+        with self.timed("load_player"): return self._load_or_create_player(username)
+
+    def save_game(self, player_id, snap, fields=None):
+        """
+        Guarda la partida por PlayerID: solo las columnas de `fields` (campos
+        de SaveSnapshot) o, con None, todas en un upsert. Devuelve False si
+        la BD no está disponible.
+        """
+        with self.timed("save_game" if fields is None else "save_delta"): return self._save_game(player_id, snap, fields)
+
+    def insert_events(self, player_id, rows):
+        """Inserta en GameEvents un lote de (tipo, fase, valor, detalle, ms). False si no hay BD."""
+        with self.timed("insert_events"): return self._insert_events([(player_id,) + r for r in rows])
+
+    def session(self, username):
+        return PlayerSession(self, username)
+
+    def load_monsters(self):
+        with self.timed("load_monsters"): return self._load_monsters()
+
+    def catalog_version(self):
+        """Huella barata del MonsterCatalog para validar cachés (None si no hay BD)."""
+        with self.timed("catalog_version"): return self._catalog_version()
+
+    def close(self):
+        with self._timing_lock: timings = {op: tuple(t) for op, t in self.timings.items()}
+        for op, (n, total) in timings.items():
+            print(f"BD {self.name} {op}: {n} llamadas, {total / n * 1000:.2f} ms de media")
+
+
+class PlayerSession:
+    """
+    Un jugador con nombre. load() resuelve PlayerID/SaveGameID una vez y
+    los guarda; a partir de ahí cada guardado va directo por clave.
+    """
+    def __init__(self, storage, username):
+        self.storage = storage
+        self.username = username
+        self.player_id = None
+        self.save_id = None
+
+    def load(self):
+        data = self.storage.load_or_create_player(self.username)
+        if data: self.player_id, self.save_id = data["PlayerID"], data["SaveGameID"]
+        return data
+
+    def save(self, snap, fields=None):
+        if self.player_id is None and not self.load(): return False
+        return self.storage.save_game(self.player_id, snap, fields)
+
+
+class SqlServerStorage(Storage):
+    name = "sqlserver"
+
+    # Un solo lote por operación (SET NOCOUNT ON: el único resultado es el SELECT final)
+    SQL_LOAD_OR_CREATE = """SET NOCOUNT ON;
+        DECLARE @u VARCHAR(50) = ?;
+        MERGE Players WITH (HOLDLOCK) AS t USING (SELECT @u AS Username) AS s ON t.Username = s.Username
+        WHEN NOT MATCHED THEN INSERT (Username, PasswordHash) VALUES (s.Username, '1234');
+        DECLARE @pid INT = (SELECT PlayerID FROM Players WHERE Username = @u);
+        MERGE SaveGames WITH (HOLDLOCK) AS t USING (SELECT @pid AS PlayerID) AS s ON t.PlayerID = s.PlayerID
+        WHEN NOT MATCHED THEN INSERT (PlayerID, CurrentHP, MaxHP, PositionX, PositionY, Level, ExperiencePoints, PositionZ, Potions)
+                              VALUES (s.PlayerID, 100, 100, 400, 300, 1, 0, 1.0, 3);
+        SELECT PlayerID, SaveGameID, Level, CurrentHP, MaxHP, ExperiencePoints, PositionZ, Potions FROM SaveGames WHERE PlayerID = @pid;"""
+    SQL_SAVE = """SET NOCOUNT ON;
+        MERGE SaveGames WITH (HOLDLOCK) AS t
+        USING (SELECT ? AS PlayerID, ? AS Level, ? AS CurrentHP, ? AS MaxHP, ? AS ExperiencePoints, ? AS PositionX, ? AS PositionY, ? AS PositionZ, ? AS Potions) AS s
+        ON t.PlayerID = s.PlayerID
+        WHEN MATCHED THEN UPDATE SET Level=s.Level, CurrentHP=s.CurrentHP, MaxHP=s.MaxHP, ExperiencePoints=s.ExperiencePoints,
+                                     PositionX=s.PositionX, PositionY=s.PositionY, PositionZ=s.PositionZ, Potions=s.Potions, LastSaved=GETDATE()
+        WHEN NOT MATCHED THEN INSERT (PlayerID, Level, CurrentHP, MaxHP, ExperiencePoints, PositionX, PositionY, PositionZ, Potions)
+                              VALUES (s.PlayerID, s.Level, s.CurrentHP, s.MaxHP, s.ExperiencePoints, s.PositionX, s.PositionY, s.PositionZ, s.Potions);"""
+
+    # Bases creadas antes de Potions, GameEvents y los índices: cada paso es idempotente
+    MIGRATIONS = (
+        "IF COL_LENGTH('dbo.SaveGames', 'Potions') IS NULL ALTER TABLE dbo.SaveGames ADD Potions INT NOT NULL DEFAULT 3",
+        """IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'UX_SaveGames_PlayerID' AND object_id = OBJECT_ID('dbo.SaveGames'))
+           CREATE UNIQUE NONCLUSTERED INDEX UX_SaveGames_PlayerID ON dbo.SaveGames(PlayerID)""",
+        """IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_MonsterCatalog_ElementID' AND object_id = OBJECT_ID('dbo.MonsterCatalog'))
+           CREATE NONCLUSTERED INDEX IX_MonsterCatalog_ElementID ON dbo.MonsterCatalog(ElementID)""",
+        """IF OBJECT_ID('dbo.GameEvents', 'U') IS NULL
+           CREATE TABLE dbo.GameEvents (
+               EventID BIGINT IDENTITY(1,1) PRIMARY KEY,
+               PlayerID INT NOT NULL FOREIGN KEY REFERENCES dbo.Players(PlayerID),
+               EventType VARCHAR(20) NOT NULL,
+               Stage INT NOT NULL,
+               Value INT NOT NULL,
+               Detail VARCHAR(50) NULL,
+               SimTimeMs BIGINT NOT NULL,
+               CreatedAt DATETIME2 DEFAULT GETDATE())""",
+        """IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_GameEvents_Type_Stage' AND object_id = OBJECT_ID('dbo.GameEvents'))
+           CREATE NONCLUSTERED INDEX IX_GameEvents_Type_Stage ON dbo.GameEvents(EventType, Stage) INCLUDE (PlayerID, Value)""",
+        """IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_GameEvents_PlayerID' AND object_id = OBJECT_ID('dbo.GameEvents'))
+           CREATE NONCLUSTERED INDEX IX_GameEvents_PlayerID ON dbo.GameEvents(PlayerID)""",
+    )
+    _migrated = False               # una vez por proceso, con la primera conexión que responda
+    _migrate_lock = threading.Lock()
+
+    def __init__(self):
+        super().__init__()
+        from db_connection import db_session, get_pool   # pyodbc solo si se usa este backend
+        self._db_session = db_session
+        self.pool = get_pool()
+
+    @contextmanager
+    def db_session(self):
+        with self._db_session() as conn:
+            if conn and not SqlServerStorage._migrated: self._migrate(conn)
+            yield conn
+
+    def _migrate(self, conn):
+        import pyodbc
+        with self._migrate_lock:
+            if SqlServerStorage._migrated: return
+            c = conn.cursor()
+            for sql in self.MIGRATIONS:
+                try:
+                    c.execute(sql); conn.commit()
+                except pyodbc.Error as e:
+                    # p.ej. PlayerID duplicados impiden el índice único: se sigue sin él
+                    conn.rollback(); print(f"Migración BD omitida: {e}")
+            SqlServerStorage._migrated = True
+
+    def _load_or_create_player(self, username):
+        with self.db_session() as conn:
+            if not conn: return None
+            c = conn.cursor()
+            c.execute(self.SQL_LOAD_OR_CREATE, username)
+            data = c.fetchone()
+            conn.commit()
+            if not data: return None
+            return {"PlayerID": data[0], "SaveGameID": data[1], "Level": data[2], "HP": data[3], "MaxHP": data[4], "XP": data[5], "Unlocked": data[6], "Potions": data[7]}
+
+    def _save_game(self, player_id, snap, fields):
+        with self.db_session() as conn:
+            if not conn: return False
+            c = conn.cursor()
+            # Parcial: UPDATE de esas columnas; si aún no hay fila, MERGE completo
+            if fields is None or not c.execute(update_sql(fields, "GETDATE()"), update_args(player_id, snap, fields)).rowcount:
+                c.execute(self.SQL_SAVE, (player_id, snap.level, snap.hp, snap.max_hp, snap.xp, snap.x, snap.y, snap.unlocked, snap.potions))
+            conn.commit()
+            return True
+
+    def _insert_events(self, rows):
+        with self.db_session() as conn:
+            if not conn: return False
+            c = conn.cursor()
+            c.fast_executemany = True      # todo el lote en un solo envío de parámetros
+            c.executemany(f"INSERT INTO GameEvents {EVENT_COLUMNS} VALUES (?, ?, ?, ?, ?, ?)", rows)
+            conn.commit()
+            return True
+
+    def _load_monsters(self):
+        with self.db_session() as conn:
+            if not conn: return []
+            c = conn.cursor()
+            c.execute("SELECT MonsterName, BaseHP, BaseAttack, BaseSpeed FROM MonsterCatalog")
+            return [tuple(r) for r in c.fetchall()]
+
+    def _catalog_version(self):
+        with self.db_session() as conn:
+            if not conn: return None
+            c = conn.cursor()
+            c.execute("SELECT COUNT(*), CHECKSUM_AGG(BINARY_CHECKSUM(MonsterName, BaseHP, BaseAttack, BaseSpeed)) FROM MonsterCatalog")
+            r = c.fetchone()
+            return f"{r[0]}:{r[1]}"
+
+    def close(self):
+        super().close()
+        st = self.pool.stats
+        print(f"Pool BD: {st['hits']} hits, {st['misses']} misses, {st['waits']} esperas ({st['wait_time']*1000:.1f} ms)")
+        self.pool.close_all()
+
+
+class SqliteStorage(Storage):
+    """
+    Backend embebido: sin servicio externo, modo WAL y esquema creado desde
+    setup_database_sqlite.sql. Las consultas son constantes con parámetros,
+    así que la caché de sentencias de sqlite3 las reutiliza ya preparadas.
+    """
+    name = "sqlite"
+
+    SQL_NEW_PLAYER = "INSERT INTO Players (Username, PasswordHash) VALUES (?, '1234') ON CONFLICT(Username) DO NOTHING"
+    SQL_NEW_SAVE = """INSERT INTO SaveGames (PlayerID, CurrentHP, MaxHP, PositionX, PositionY, Level, ExperiencePoints, PositionZ, Potions)
+                      SELECT PlayerID, 100, 100, 400, 300, 1, 0, 1.0, 3 FROM Players WHERE Username = ? ON CONFLICT(PlayerID) DO NOTHING"""
+    SQL_LOAD = """SELECT s.PlayerID, s.SaveGameID, s.Level, s.CurrentHP, s.MaxHP, s.ExperiencePoints, s.PositionZ, s.Potions
+                  FROM Players p JOIN SaveGames s ON s.PlayerID = p.PlayerID WHERE p.Username = ?"""
+    # Los guardados son UPDATE por clave (update_sql) y solo si no había fila un INSERT
+    # (un upsert con INSERT gastaría un SaveGameID por guardado)
+    SQL_SAVE_NEW = """INSERT INTO SaveGames (Level, CurrentHP, MaxHP, ExperiencePoints, PositionX, PositionY, PositionZ, Potions, PlayerID)
+                      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+    SQL_MONSTERS = "SELECT MonsterName, BaseHP, BaseAttack, BaseSpeed FROM MonsterCatalog"
+    SQL_CATALOG_VERSION = "SELECT COUNT(*), group_concat(MonsterName || ',' || BaseHP || ',' || BaseAttack || ',' || BaseSpeed, ';') FROM (SELECT * FROM MonsterCatalog ORDER BY MonsterID)"
+
+    def __init__(self, path=SQLITE_PATH):
+        super().__init__()
+        self.path = path
+        # Una sola conexión compartida (hilo principal + hilos de fondo) protegida por lock
+        self.conn = sqlite3.connect(path, check_same_thread=False, cached_statements=64)
+        self.lock = threading.RLock()
+        if path != ":memory:": self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        with open(SQLITE_SCHEMA, encoding="utf-8") as f: self.conn.executescript(f.read())
+        # Bases creadas antes de la columna Potions
+        if "Potions" not in {r[1] for r in self.conn.execute("PRAGMA table_info(SaveGames)")}:
+            self.conn.execute("ALTER TABLE SaveGames ADD COLUMN Potions INTEGER DEFAULT 3")
+        self.conn.commit()
+
+    def _load_or_create_player(self, username):
+        with self.lock:
+            # Lo habitual (el jugador ya existe) es una sola lectura; si no, dos upserts idempotentes
+            data = self.conn.execute(self.SQL_LOAD, (username,)).fetchone()
+            if not data:
+                self.conn.execute(self.SQL_NEW_PLAYER, (username,))
+                self.conn.execute(self.SQL_NEW_SAVE, (username,))
+                self.conn.commit()
+                data = self.conn.execute(self.SQL_LOAD, (username,)).fetchone()
+            if not data: return None
+            return {"PlayerID": data[0], "SaveGameID": data[1], "Level": data[2], "HP": data[3], "MaxHP": data[4], "XP": data[5], "Unlocked": data[6], "Potions": data[7]}
+
+    def _save_game(self, player_id, snap, fields):
+        cols = fields or tuple(SAVE_COLUMNS)
+        with self.lock:
+            if not self.conn.execute(update_sql(cols, "CURRENT_TIMESTAMP"), update_args(player_id, snap, cols)).rowcount:
+                self.conn.execute(self.SQL_SAVE_NEW, update_args(player_id, snap, tuple(SAVE_COLUMNS)))
+            self.conn.commit()
+            return True
+
+    EVENTS_PER_INSERT = 150        # 6 parámetros por fila: por debajo del límite de 999 de SQLite antiguos
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def events_sql(n):
+        return f"INSERT INTO GameEvents {EVENT_COLUMNS} VALUES " + ", ".join(["(?, ?, ?, ?, ?, ?)"] * n)
+
+    def _insert_events(self, rows):
+        # INSERT de varias filas por sentencia, todo el lote en una transacción
+        step = self.EVENTS_PER_INSERT
+        with self.lock:
+            try:
+                for i in range(0, len(rows), step):
+                    chunk = rows[i:i + step]
+                    self.conn.execute(self.events_sql(len(chunk)), [v for r in chunk for v in r])
+            except sqlite3.Error:
+                self.conn.rollback(); raise
+            self.conn.commit()
+            return True
+
+    def _load_monsters(self):
+        with self.lock:
+            return self.conn.execute(self.SQL_MONSTERS).fetchall()
+
+    def _catalog_version(self):
+        with self.lock:
+            n, rows = self.conn.execute(self.SQL_CATALOG_VERSION).fetchone()
+        return f"{n}:{zlib.crc32((rows or '').encode())}"
+
+    def close(self):
+        super().close()
+        with self.lock: self.conn.close()
+
+
+BACKENDS = {"sqlserver": SqlServerStorage, "sqlite": SqliteStorage}
+
+def get_storage(backend=None, **kwargs) -> Storage:
+    backend = backend or DB_BACKEND
+    if backend not in BACKENDS: raise ValueError(f"Backend de BD desconocido: {backend}")
+    print(f"Backend BD: {backend}")
+    return BACKENDS[backend](**kwargs)
+
+# Prueba rápida de latencia: RPG_DB_BACKEND=sqlite python storage.py
+if __name__ == "__main__":
+    from save_queue import SaveSnapshot
+    st = get_storage()
+    player = st.session("Player1")
+    player.load()
+    for i in range(200):
+        player.save(SaveSnapshot(1, 100, 100, i, 400, 300, 1.0, 3), ("xp",))
+        player.load()
+    st.load_monsters()
+    st.close()
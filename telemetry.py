@@ -0,0 +1,91 @@
+import threading
+
+# Tipos de evento de juego que se guardan en GameEvents
+EVENT_TYPES = ("kill", "damage", "hurt", "level_up", "potion", "stage_clear")
+
+# --- TELEMETRÍA POR LOTES ---
+class EventBuffer:
+    """
+    Búfer en memoria de eventos de juego (tipo, fase, valor, detalle, ms de
+    simulación). record() solo añade a una lista; un hilo la vacía en lotes
+    con sink(filas) -> bool cuando llega a `batch_size` o cada
+    `flush_interval` segundos. Si la BD no da abasto o no responde, el
+    búfer crece hasta `capacity` y a partir de ahí se descartan los eventos
+    nuevos (contrapresión sin bloquear el bucle de juego); un lote fallido
+    vuelve a la cola si cabe.
+    """
+    def __init__(self, sink, batch_size=256, flush_interval=2.0, capacity=8192, retry_delay=5.0):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.capacity = capacity
+        self.retry_delay = retry_delay
+        self._rows = []
+        self._in_flight = 0
+        self._flushing = False
+        self._stopping = False
+        self._cond = threading.Condition()
+        self.stats = {"recorded": 0, "written": 0, "batches": 0, "failed_batches": 0, "dropped": 0, "rejected": 0, "max_queued": 0}
+        self._thread = threading.Thread(target=self._worker, name="EventBuffer", daemon=True)
+        self._thread.start()
+
+    def record(self, kind, stage, value=0, detail=None, t_ms=0):
+        with self._cond:
+            # Un tipo mal escrito pierde esa fila, nunca tumba el bucle de juego
+            if kind not in EVENT_TYPES: self.stats["rejected"] += 1; return
+            if len(self._rows) + self._in_flight >= self.capacity: self.stats["dropped"] += 1; return
+            self._rows.append((kind, stage, int(value), detail, int(t_ms)))
+            self.stats["recorded"] += 1
+            if len(self._rows) > self.stats["max_queued"]: self.stats["max_queued"] = len(self._rows)
+            if len(self._rows) >= self.batch_size: self._cond.notify_all()
+
+    @property
+    def queued(self):
+        return len(self._rows) + self._in_flight
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._rows) >= self.batch_size or self._flushing or self._stopping, self.flush_interval)
+                if not self._rows:
+                    if self._stopping: return
+                    continue
+                batch, self._rows = self._rows[:self.batch_size], self._rows[self.batch_size:]
+                self._in_flight = len(batch)
+            try: ok = bool(self.sink(batch))
+            except Exception as e:
+                print(f"Error guardando eventos: {e}")
+                ok = False
+            with self._cond:
+                self._in_flight = 0
+                if ok:
+                    self.stats["written"] += len(batch); self.stats["batches"] += 1
+                else:
+                    self.stats["failed_batches"] += 1
+                    if self._stopping:         # al salir con la BD caída se pierde lo que quede
+                        self.stats["dropped"] += len(batch) + len(self._rows); self._rows = []
+                    else:
+                        room = self.capacity - len(self._rows)
+                        self.stats["dropped"] += max(0, len(batch) - room)
+                        if room > 0: self._rows[:0] = batch[:room]
+                self._cond.notify_all()
+                if not ok:
+                    if self._stopping: return
+                    self._cond.wait_for(lambda: self._stopping, self.retry_delay)
+
+    def flush(self, timeout=3.0):
+        """Fuerza el volcado de lo pendiente y espera. Devuelve False si vence el plazo."""
+        with self._cond:
+            self._flushing = True
+            self._cond.notify_all()
+            ok = self._cond.wait_for(lambda: not self.queued, timeout)
+            self._flushing = False
+            return ok
+
+    def stop(self, timeout=3.0):
+        ok = self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(0.5)
+        return ok
@@ -0,0 +1,66 @@
+from collections import OrderedDict
+
+import pygame
+
+# --- CACHÉ DE TEXTOS RENDERIZADOS ---
+class TextCache:
+    """
+    Guarda las Surface de font.render por (fuente, texto, color, sombra) con
+    expulsión LRU, limitada en número de entradas y en bytes de píxeles.
+    """
+    def __init__(self, max_bytes=8 * 1024 * 1024, max_entries=1024):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()    # clave -> (Surface, bytes)
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @property
+    def hit_rate(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[0]
+
+    def _put(self, key, surf):
+        size = surf.get_width() * surf.get_height() * surf.get_bytesize()
+        self._entries[key] = (surf, size)
+        self.bytes += size
+        while self._entries and (self.bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            _, (_, old) = self._entries.popitem(last=False)
+            self.bytes -= old; self.stats["evictions"] += 1
+        return surf
+
+    def render(self, font, text, color):
+        text = str(text)
+        key = (font, text, color, None)
+        return self._get(key) or self._put(key, font.render(text, True, color))
+
+    def render_shadowed(self, font, text, color, shadow=(0, 0, 0), offset=2):
+        """Texto con su sombra desplazada ya compuestos en una sola Surface."""
+        text = str(text)
+        key = (font, text, color, (shadow, offset))
+        surf = self._get(key)
+        if surf: return surf
+        fg = font.render(text, True, color)
+        bg = font.render(text, True, shadow)
+        surf = pygame.Surface((fg.get_width() + offset, fg.get_height() + offset), pygame.SRCALPHA)
+        surf.blit(bg, (offset, offset)); surf.blit(fg, (0, 0))
+        return self._put(key, surf)
+
+    def clear(self):
+        self._entries.clear(); self.bytes = 0
+
+    def report(self):
+        print(f"Caché de textos: {self.hit_rate:.1%} aciertos, {len(self._entries)} entradas, "
+              f"{self.bytes // 1024} KB, {self.stats['evictions']} expulsiones")
+
+# Instancia compartida por el motor y los FloatingText
+text_cache = TextCache()